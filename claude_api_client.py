@@ -6,27 +6,71 @@ eliminating the mock response issues that occur with Claude Code's Task function
 """
 
 import os
+import re
 import json
+import asyncio
+import copy
 import logging
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+import threading
+import time
+import weakref
+from typing import Dict, Any, Callable, List, Optional, Tuple
 
 try:
     import anthropic
+    import httpx
     from anthropic import APIError, APITimeoutError, RateLimitError, APIStatusError
 except ImportError:
     raise ImportError("anthropic package not found. Install with: uv pip install anthropic")
 
+try:
+    import h2  # noqa: F401 - httpx only speaks HTTP/2 when h2 is installed
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
 try:
     from dotenv import load_dotenv
     load_dotenv()  # Load environment variables from .env file
 except ImportError:
     pass  # dotenv is optional
 
+# Read once at import (after .env is loaded) rather than on every client construction
+_DEFAULT_API_KEY = os.getenv('ANTHROPIC_API_KEY')
+# Optional overrides for the models used by get_api_client() (e.g. a Haiku select model)
+_ENV_PARSE_MODEL = os.getenv('CLAUDE_MUSIC_PARSE_MODEL')
+_ENV_SELECT_MODEL = os.getenv('CLAUDE_MUSIC_SELECT_MODEL')
+
+from music_cache import PersistentLRU, SemanticCache
+from progress_log import LOG_ENABLED, write_progress
+
+# jiter (a dependency of the anthropic SDK) decodes JSON several times faster than json
+try:
+    from jiter import from_json as _jiter_from_json
+
+    def _loads(text: str) -> Any:
+        """Decode a JSON document; raises ValueError on invalid input."""
+        return _jiter_from_json(text.encode())
+except ImportError:
+    _loads = json.loads
+
+# orjson is optional; it encodes several times faster than json
+try:
+    import orjson
+
+    def _dumps(value: Any) -> str:
+        """Encode a value as JSON text."""
+        return orjson.dumps(value).decode()
+except ImportError:
+    _dumps = json.dumps
+
 # Import existing prompt templates
 try:
-    from music_parsing_prompts import STANDARD_MUSIC_PARSING_PROMPT, ENHANCED_MUSIC_PARSING_PROMPT, format_result_selection_prompt
+    from music_parsing_prompts import (STANDARD_MUSIC_PARSING_PROMPT, ENHANCED_MUSIC_PARSING_PROMPT, BATCH_MUSIC_PARSING_PROMPT,
+                                       format_result_selection_title_prompt, format_result_selection_album_prompt)
+    _HAS_SELECTION_TEMPLATE = True
 except ImportError:
+    _HAS_SELECTION_TEMPLATE = False
     # Fallback prompt if module not available
     STANDARD_MUSIC_PARSING_PROMPT = """
 Parse the following natural language music request into structured components:
@@ -44,20 +88,201 @@ Examples:
 
 Do not include any explanatory text. Return only the raw JSON.
 """
+    ENHANCED_MUSIC_PARSING_PROMPT = STANDARD_MUSIC_PARSING_PROMPT
+
+# The parsing instructions are identical for every request, so they go in a system block
+# (formatted once here) and only the request itself is sent in the user turn. At ~700
+# tokens the block is below Haiku's minimum cacheable length, so cache_control has no
+# effect with the default parse model; it only applies if the instructions outgrow it
+_PARSE_SYSTEM = [{
+    "type": "text",
+    "text": ENHANCED_MUSIC_PARSING_PROMPT.format(request="<the request in the user message>"),
+    "cache_control": {"type": "ephemeral"},
+}]
+
+
+if LOG_ENABLED:
+    def log_progress(message: str, *args):
+        """Log progress to file for monitoring (`args` are %-formatted in)."""
+        write_progress("API", message % args if args else message)
+else:
+    def log_progress(message: str, *args):
+        """Progress logging is disabled (CLAUDE_MUSIC_LOG=0), so nothing is formatted."""
+
+
+# Regex fallback patterns, compiled once at import
+_PREFIX_RE = re.compile(r'^(play\s+|i\s+want\s+to\s+hear\s+|put\s+on\s+)')
+_LIVE_RE = re.compile(r'\blive\s+(version|recording)')
+_ACOUSTIC_RE = re.compile(r'\bacoustic\s+version')
+_BY_RE = re.compile(r'^(.+?)\s+by\s+(.+)$')
+_POSS_RE = re.compile(r"^(.+?)'s\s+(.+)$")
+_JSON_RE = re.compile(r'\{[^}]*"title"[^}]*\}')
+_WORD_RE = re.compile(r"[\w']+")
+# A selection reply's position is its first number, allowing a short lead-in such as
+# 'Position: ' or '{"position": '; the stream is settled once that number is complete
+# (or the lead-in is too long to be one)
+_POSITION_RE = re.compile(r'\D{0,20}?(\d+)')
+_POSITION_SETTLED_RE = re.compile(r'\D{0,20}?\d+\D|\D{21}')
+
+# Selection has a cheap programmatic fallback, so its calls are capped (without SDK
+# retries) and skipped for a cooldown after several consecutive failures
+_SELECT_TIMEOUT = 3.0
+_SELECT_FAILURE_LIMIT = 3
+_SELECT_COOLDOWN = 30.0
+
+# Forcing this tool makes Claude return the parse as a structured tool input instead of
+# free text, so there is no JSON to decode (or prose to strip) on the parsing path
+_NULLABLE_STRING = {"type": ["string", "null"]}
+_PARSE_TOOL = {
+    "name": "emit_parsed_request",
+    "description": "Record the structured components of a natural language music request.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "title": _NULLABLE_STRING,
+            "artist": _NULLABLE_STRING,
+            "album": _NULLABLE_STRING,
+            "preferences": {
+                "type": "object",
+                "properties": {
+                    "prefer_live": {"type": "boolean"},
+                    "prefer_acoustic": {"type": "boolean"},
+                    "prefer_studio": {"type": "boolean"},
+                },
+            },
+        },
+        "required": ["title", "artist", "album", "preferences"],
+    },
+}
+
+# Words that carry no title/artist/album information when comparing a request to a cached parse
+_FILLER_WORDS = frozenset(
+    "play put on i i'd id like to hear want can you please some the a an by of from "
+    "song track version me".split()
+)
+
+# Request words that are accounted for by a preference flag rather than a parsed field
+_PREFERENCE_WORDS = {
+    'live': 'prefer_live', 'concert': 'prefer_live',
+    'acoustic': 'prefer_acoustic', 'unplugged': 'prefer_acoustic',
+    'studio': 'prefer_studio', 'original': 'prefer_studio',
+}
+
+
+def _content_words(text: str) -> set:
+    """Split text into lowercase words, dropping possessive 's and filler words."""
+    words = set()
+    for word in _WORD_RE.findall(text.lower()):
+        if word.endswith("'s"):
+            word = word[:-2]
+        if word and word not in _FILLER_WORDS:
+            words.add(word)
+    return words
+
+
+def _parse_covers_request(request: str, parsed: Dict[str, Any]) -> bool:
+    """
+    Check that a cached parse accounts for every meaningful word of a new request.
+
+    Semantic similarity alone would happily map "harvest moon by neil young" onto a
+    cached parse of "harvest by neil young", so a semantic cache hit is only accepted
+    when the request and the parsed fields contain the same content words, and every
+    preference the cached parse set is asked for in the request (a cached "live" parse
+    must not answer a plain request).
+    """
+    fields = " ".join(str(parsed.get(key) or "") for key in ('title', 'artist', 'album'))
+    field_words = _content_words(fields)
+    request_words = _content_words(request)
+    preferences = parsed.get('preferences') or {}
+
+    requested = {_PREFERENCE_WORDS[word] for word in request_words if word in _PREFERENCE_WORDS}
+    if any(value and key not in requested for key, value in preferences.items()):
+        return False
+
+    for word in request_words - field_words:
+        if word in ('album', 'record'):
+            if not parsed.get('album') or parsed.get('title'):
+                return False
+        elif not preferences.get(_PREFERENCE_WORDS.get(word)):
+            return False
+
+    return field_words <= request_words
 
 
-def log_progress(message: str):
-    """Log progress to file for monitoring."""
-    timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-    log_message = f"[{timestamp}] 🎵 API {message}"
+def _normalize(request: str) -> str:
+    """Lowercase a request, collapse whitespace and strip a leading "play"/"put on"/etc."""
+    return _PREFIX_RE.sub('', " ".join(request.lower().split()), count=1)
+
+
+def _regex_parse(request: str) -> Dict[str, Any]:
+    """
+    Simple regex parsing of "song by artist" and "artist's song" requests.
     
-    try:
-        log_file = os.path.expanduser(".claude_music_progress.log")
-        with open(log_file, "a") as f:
-            f.write(log_message + "\n")
-            f.flush()
-    except:
-        pass  # Don't fail if we can't write to file
+    Always returns a result; anything unrecognized is treated as a bare title.
+    """
+    request_lower = _normalize(request)
+    
+    # Simple preferences detection
+    preferences = {}
+    if _LIVE_RE.search(request_lower):
+        preferences['prefer_live'] = True
+    elif _ACOUSTIC_RE.search(request_lower):
+        preferences['prefer_acoustic'] = True
+    
+    # Simple "by" pattern
+    by_match = _BY_RE.search(request_lower)
+    if by_match:
+        return {
+            'title': by_match.group(1).strip(),
+            'artist': by_match.group(2).strip(),
+            'preferences': preferences
+        }
+    
+    # Simple possessive pattern
+    poss_match = _POSS_RE.search(request_lower)
+    if poss_match:
+        return {
+            'title': poss_match.group(2).strip(),
+            'artist': poss_match.group(1).strip(),
+            'preferences': preferences
+        }
+    
+    # Fallback: treat as title only
+    return {
+        'title': request_lower,
+        'artist': None,
+        'preferences': preferences
+    }
+
+
+# Words that mean a request needs the LLM (albums, versions, vague asks, unusual phrasing)
+_LOCAL_PARSE_STOP_WORDS = frozenset(
+    "album record lp live concert acoustic unplugged studio original version recording "
+    "some something anything song track i i'd id like hear can could would you please me".split()
+)
+
+
+def _try_local_parse(request: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse a request locally when it is unambiguous, without calling the API.
+    
+    Only short, explicit "song by artist" and "artist's song" requests qualify.
+    Anything mentioning albums, versions or vague phrasing, and bare titles with no
+    artist, returns None so the caller falls through to the LLM.
+    
+    Returns:
+        Dict with title, artist, album and preferences, or None when confidence is low
+    """
+    if len(request) > 60:
+        return None
+    parsed = _regex_parse(request)
+    if not _LOCAL_PARSE_STOP_WORDS.isdisjoint(_WORD_RE.findall(f"{parsed['title']} {parsed['artist']}")):
+        return None
+    if not parsed['artist'] or not parsed['title']:
+        return None
+    
+    parsed['album'] = None
+    return parsed
 
 
 class ClaudeAPIClient:
@@ -68,16 +293,38 @@ class ClaudeAPIClient:
     behavior of Claude Code's Task function.
     """
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "claude-4-sonnet-20250514"): #claude-3-5-sonnet-20241022
+    def __init__(self, api_key: Optional[str] = None, model: str = "claude-4-sonnet-20250514", #claude-3-5-sonnet-20241022
+                 semantic_cache: bool = True, local_fast_path: bool = False, exact_cache: bool = True,
+                 parse_model: str = "claude-haiku-4-5",
+                 select_model: Optional[str] = None, select_timeout: float = _SELECT_TIMEOUT):
         """
         Initialize the Claude API client.
         
         Args:
             api_key: Anthropic API key (if None, will look for ANTHROPIC_API_KEY env var)
-            model: Claude model to use for requests
+            model: Claude model to use for requests, and as the fallback when the
+                   parse/select model returns something unusable
+            semantic_cache: Whether to reuse parses of semantically identical requests (only
+                            takes effect with CLAUDE_MUSIC_SEMANTIC_CACHE=1, which loads the
+                            embedding model)
+            exact_cache: Whether to reuse parses of previously seen (normalized) requests
+            local_fast_path: Whether to parse unambiguous "song by artist" requests with regexes
+                             instead of the API. Off by default because the LLM also recognizes
+                             album names (e.g. "arbour zena by keith jarrett"), which regexes can't.
+            parse_model: Faster, cheaper model tried first for request parsing
+            select_model: Model tried first for picking a search result (defaults to `model`,
+                          since selection benefits from the stronger model)
+            select_timeout: Seconds allowed for each selection call before giving up
         """
-        self.api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
+        self.api_key = api_key or _DEFAULT_API_KEY
         self.model = model
+        self.parse_model = parse_model
+        self.select_model = select_model or model
+        self.parse_cache = SemanticCache(namespace=parse_model) if semantic_cache else None
+        self.exact_cache = PersistentLRU(namespace=parse_model, db_filename="parse_cache.db") if exact_cache else None
+        self.local_fast_path = local_fast_path
+        self._select_failures = 0  # Consecutive failed selection calls
+        self._select_tripped_at = 0.0  # When the failure limit was last reached
         
         if not self.api_key:
             raise ValueError(
@@ -85,86 +332,379 @@ class ClaudeAPIClient:
                 "Get your key from: https://console.anthropic.com/account/keys"
             )
         
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # Explicit pools keep TLS connections alive between calls and share HTTP/2 streams
+        limits = httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60)
+        self.client = anthropic.Anthropic(
+            api_key=self.api_key,
+            http_client=anthropic.DefaultHttpxClient(http2=_HTTP2, limits=limits)
+        )
+        # Same connection pool, but selection calls fail fast instead of retrying
+        self.select_client = self.client.with_options(timeout=select_timeout, max_retries=0)
+        self._http_limits = limits
+        self._aclients = weakref.WeakKeyDictionary()  # Event loop -> AsyncAnthropic
+        self._aclients_lock = threading.Lock()
         log_progress("🔌 API client initialized successfully")
     
     
-    def parse_music_request(self, request: str) -> Dict[str, Any]:
+    @property
+    def aclient(self) -> anthropic.AsyncAnthropic:
+        """
+        The async client for the running event loop.
+        
+        An async httpx pool is bound to the loop it was first used on, so each loop
+        (e.g. each asyncio.run() call) gets its own client, which is dropped along
+        with the loop instead of being reused after that loop has closed.
+        """
+        loop = asyncio.get_running_loop()
+        with self._aclients_lock:
+            client = self._aclients.get(loop)
+            if client is None:
+                client = anthropic.AsyncAnthropic(
+                    api_key=self.api_key,
+                    http_client=anthropic.DefaultAsyncHttpxClient(http2=_HTTP2, limits=self._http_limits)
+                )
+                self._aclients[loop] = client
+        return client
+    
+    def parse_music_request(self, request: str,
+                            on_fields: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         Parse a natural language music request using Claude API.
         
         Args:
             request: Natural language music request
+            on_fields: Optional callback; when given, the response is streamed and the callback
+                       receives the partial parse as soon as title and artist are complete
+                       (not called for cached or locally parsed requests)
             
         Returns:
             Dict with parsed components: {'title': str, 'artist': str|None, 'preferences': dict}
         """
+        if on_fields is None:
+            return self.parse_music_requests([request])[0]
+        
+        norm, embedding, cached = self._try_without_api(request)
+        if cached is not None:
+            return cached
+        return self._parse_single(norm, embedding, on_fields)
+    
+    def parse_music_requests(self, requests: List[str]) -> List[Dict[str, Any]]:
+        """
+        Parse several natural language music requests with as few API calls as possible.
+        
+        Cached requests are answered locally; when more than one request is left, they
+        are all parsed by a single Claude call that returns a JSON array. Any request the
+        batch response doesn't cover is parsed individually.
+        
+        Args:
+            requests: Natural language music requests
+            
+        Returns:
+            List of parsed dicts (same shape as parse_music_request), in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+        pending = []
+        
+        for i, request in enumerate(requests):
+            norm, embedding, cached = self._try_without_api(request)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append((i, norm, embedding))
+        
+        if len(pending) > 1:
+            batch_results = self._parse_batch([norm for _, norm, _ in pending])
+            remaining = []
+            for (i, norm, embedding), parsed in zip(pending, batch_results):
+                if parsed is None:
+                    remaining.append((i, norm, embedding))
+                    continue
+                self._remember_parse(norm, embedding, parsed)
+                results[i] = parsed
+            pending = remaining
+        
+        for i, norm, embedding in pending:
+            results[i] = self._parse_single(norm, embedding)
+        
+        return results
+    
+    def _try_without_api(self, request: str):
+        """
+        Resolve a request locally via the regex fast path or the semantic cache.
+        
+        The request is normalized once here; the normalized text is the cache key and is
+        what gets sent to the API if the request can't be resolved locally.
+        
+        Returns:
+            Tuple of (normalized request, embedding, local_result or None)
+        """
+        norm = _normalize(request)
+        
+        if self.exact_cache:
+            cached = self.exact_cache.get(norm)
+            if cached is not None:
+                log_progress("⚡ Parse cache hit for '%.50s' - skipping API call", norm)
+                return norm, None, copy.deepcopy(cached)
+        
+        if self.local_fast_path:
+            parsed = _try_local_parse(norm)
+            if parsed is not None:
+                log_progress("🏎️ Local fast path for '%.50s' - skipping API call", norm)
+                return norm, None, parsed
+        
+        if not self.parse_cache:
+            return norm, None, None
+        
         try:
-            log_progress(f"🎯 Parsing request: '{request[:50]}...'")
+            embedding = self.parse_cache.encode(norm)
+            cached = self.parse_cache.lookup(
+                embedding, accept=lambda parsed: _parse_covers_request(norm, parsed)
+            )
+        except Exception as e:
+            log_progress("⚠️ Semantic cache unavailable: %s", e)
+            return norm, None, None
+        
+        if cached is not None:
+            log_progress("⚡ Semantic cache hit for '%.50s' - skipping API call", norm)
+            return norm, embedding, copy.deepcopy(cached)
+        return norm, embedding, None
+    
+    @staticmethod
+    def _validate_parsed(parsed_result: Any) -> None:
+        """Raise ValueError unless parsed_result has the expected parse structure."""
+        if not isinstance(parsed_result, dict):
+            raise ValueError("Response is not a JSON object")
+
+        keys = {'title', 'artist', 'album', 'preferences'}
+        if not keys.issubset(parsed_result.keys()):
+            raise ValueError(f"Response missing required keys: {keys}")
+    
+    def _parse_batch(self, requests: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Parse several requests with one API call.
+        
+        Returns:
+            List aligned with requests; entries the response didn't cover are None
+        """
+        parsed_results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+        try:
+            log_progress("🎯 Batch parsing %d requests", len(requests))
             
-            # Format the prompt with the actual request
-            prompt = ENHANCED_MUSIC_PARSING_PROMPT.format(request=request)
+            numbered = "\n".join(f'{i}. "{request}"' for i, request in enumerate(requests, 1))
+            prompt = BATCH_MUSIC_PARSING_PROMPT.format(count=len(requests), requests=numbered)
             
-            # Call Claude API directly
             response = self.client.messages.create(
-                model=self.model,
-                max_tokens=200,
+                model=self.parse_model,
+                max_tokens=80 * len(requests),
                 temperature=0.0,  # Deterministic parsing
                 messages=[{"role": "user", "content": prompt}]
             )
             
             response_text = response.content[0].text.strip()
-            log_progress(f"📝 API response: '{response_text[:100]}...'")
+            log_progress("📝 Batch API response: '%.100s...'", response_text)
+            
+            batch = _loads(response_text)
+            if not isinstance(batch, list):
+                raise ValueError("Response is not a JSON array")
+            if len(batch) != len(requests):
+                log_progress("⚠️ Batch returned %d results for %d requests", len(batch), len(requests))
+            
+            for i, parsed_result in enumerate(batch[:len(requests)]):
+                try:
+                    self._validate_parsed(parsed_result)
+                    parsed_results[i] = parsed_result
+                except ValueError as e:
+                    log_progress("❌ Batch item %d invalid: %s", i + 1, e)
+            
+        except Exception as e:
+            log_progress("❌ Batch parsing failed, parsing individually: %s", e)
+        
+        return parsed_results
+    
+    def _parse_single(self, request: str, embedding,
+                      on_fields: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Parse one normalized request with its own API call (see parse_music_request)."""
+        try:
+            log_progress("🎯 Parsing request: '%.50s...'", request)
+            
+            # Call Claude API directly
+            params = self._parse_request_params(request)
+            if on_fields is not None:
+                response = self._stream_parse(params, on_fields)
+            else:
+                response = self.client.messages.create(**params)
+            parsed_result, response_text = self._decode_parse_response(response)
+            
+            if parsed_result is None and params['model'] != self.model:
+                log_progress("🔁 Retrying parse with %s", self.model)
+                response = self.client.messages.create(**{**params, 'model': self.model})
+                parsed_result, response_text = self._decode_parse_response(response)
+            
+            return self._finish_parse(request, parsed_result, response_text, embedding)
+        
+        except Exception as e:
+            return self._parse_error(request, e)
+    
+    def _stream_parse(self, params: Dict[str, Any], on_fields: Callable[[Dict[str, Any]], None]):
+        """
+        Stream a parse call, handing the partial tool input to on_fields once title and
+        artist are complete, and return the final message.
+        """
+        notified = False
+        with self.client.messages.stream(**params) as stream:
+            for event in stream:
+                if notified or event.type != "input_json":
+                    continue
+                # The SDK's snapshot only contains fully received values
+                snapshot = event.snapshot
+                if isinstance(snapshot, dict) and 'title' in snapshot and 'artist' in snapshot:
+                    notified = True
+                    try:
+                        on_fields(dict(snapshot))
+                    except Exception as e:
+                        log_progress("⚠️ Partial parse callback failed: %s", e)
+            return stream.get_final_message()
+    
+    async def aparse_music_request(self, request: str) -> Dict[str, Any]:
+        """
+        Async version of parse_music_request built on anthropic.AsyncAnthropic.
+        
+        Args:
+            request: Natural language music request
+            
+        Returns:
+            Dict with parsed components (same shape as parse_music_request)
+        """
+        request, embedding, cached = self._try_without_api(request)
+        if cached is not None:
+            return cached
+        
+        try:
+            log_progress("🎯 Parsing request (async): '%.50s...'", request)
+            params = self._parse_request_params(request)
+            response = await self.aclient.messages.create(**params)
+            parsed_result, response_text = self._decode_parse_response(response)
+            
+            if parsed_result is None and params['model'] != self.model:
+                log_progress("🔁 Retrying parse with %s", self.model)
+                response = await self.aclient.messages.create(**{**params, 'model': self.model})
+                parsed_result, response_text = self._decode_parse_response(response)
+            
+            return self._finish_parse(request, parsed_result, response_text, embedding)
+        
+        except Exception as e:
+            return self._parse_error(request, e)
+    
+    async def aparse_many(self, requests: List[str], max_concurrency: int = 10) -> List[Dict[str, Any]]:
+        """
+        Parse several requests concurrently, one API call each.
+        
+        Args:
+            requests: Natural language music requests
+            max_concurrency: Maximum number of API calls in flight (respects rate limits)
+            
+        Returns:
+            List of parsed dicts, in input order
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def parse_one(request: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.aparse_music_request(request)
+        
+        return list(await asyncio.gather(*(parse_one(request) for request in requests)))
+    
+    def _parse_request_params(self, request: str) -> Dict[str, Any]:
+        """Build the messages.create() arguments for parsing a single request."""
+        return {
+            'model': self.parse_model,
+            'max_tokens': 100,  # The tool input is a tiny JSON object
+            'temperature': 0.0,  # Deterministic parsing
+            'system': _PARSE_SYSTEM,
+            'tools': [_PARSE_TOOL],
+            'tool_choice': {"type": "tool", "name": _PARSE_TOOL["name"]},
+            'messages': [{"role": "user", "content": request}]
+        }
+    
+    def _decode_parse_response(self, response) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Decode and validate a parse response.
+        
+        Returns:
+            (parsed dict, or None if the response was not valid JSON of the expected shape;
+             raw response text)
+        """
+        tool_use = next((block for block in response.content if block.type == "tool_use"), None)
+        if tool_use is not None:
+            # Structured output: the tool input is already a dict
+            parsed_result = tool_use.input
+            response_text = _dumps(parsed_result)
+            log_progress("📝 API response: '%.100s...'", response_text)
+        else:
+            response_text = "".join(block.text for block in response.content if block.type == "text").strip()
+            log_progress("📝 API response: '%.100s...'", response_text)
             
             # Parse the JSON response
             try:
-                parsed_result = json.loads(response_text)
-                log_progress("✅ Successfully parsed JSON response")
-                
-                # Validate the response structure
-                if not isinstance(parsed_result, dict):
-                    raise ValueError("Response is not a JSON object")
-
-                keys = {'title', 'artist', 'album', 'preferences'}
-                if not keys.issubset(parsed_result.keys()):
-                    raise ValueError(f"Response missing required keys: {keys}")
-                
-                return parsed_result
-                
-            except json.JSONDecodeError as e:
-                log_progress(f"❌ JSON parsing failed: {str(e)}")
-                log_progress(f"Raw response: '{response_text}'")
-                
-                # Try to extract information using regex as fallback
-                return self._fallback_parse(request, response_text)
-
-        except APIStatusError as e:
-        # Check for the specific status code
+                parsed_result = _loads(response_text)
+            except ValueError as e:  # json.JSONDecodeError is a ValueError too
+                log_progress("❌ JSON parsing failed: %s", e)
+                log_progress("Raw response: '%s'", response_text)
+                return None, response_text
+        
+        # Validate the response structure
+        try:
+            self._validate_parsed(parsed_result)
+        except ValueError as e:
+            log_progress("❌ Invalid parse response: %s", e)
+            return None, response_text
+        
+        log_progress("✅ Successfully parsed JSON response")
+        return parsed_result, response_text
+    
+    def _finish_parse(self, request: str, parsed_result: Optional[Dict[str, Any]], response_text: str,
+                      embedding) -> Dict[str, Any]:
+        """Cache a successful parse, or fall back to extracting what we can from the response."""
+        if parsed_result is None:
+            # Try to extract information using regex as fallback
+            return self._fallback_parse(request, response_text)
+        
+        self._remember_parse(request, embedding, parsed_result)
+        return parsed_result
+    
+    def _remember_parse(self, norm: str, embedding, parsed_result: Dict[str, Any]) -> None:
+        """Store a successful API parse in the exact and semantic caches."""
+        if self.exact_cache:
+            self.exact_cache.put(norm, copy.deepcopy(parsed_result))
+        if embedding is not None:
+            self.parse_cache.store(norm, embedding, copy.deepcopy(parsed_result))
+    
+    def _parse_error(self, request: str, e: Exception) -> Dict[str, Any]:
+        """Log a parsing failure and convert it to an error dict."""
+        if isinstance(e, APIStatusError):
+            # Check for the specific status code
             if e.status_code == 529:
                 log_progress("❌ API error: HTTP 529 error. The API is temporarily overloaded.")
                 return {
                     'error': 'HTTP 529 error. The API is temporarily overloaded',
                 }
                 # ? add retry logic here
-            else:
-                # Handle other HTTP errors
-                log_progress(f"❌ API Status Error: {e.status_code}. Details: {e.args}")
-                return {
-                    'error': f'API Status Error: {e.status_code}. Details: {e.args}',
-                }
-                # raise e        
-        except APIError as e:
-            log_progress(f"❌ API error: {str(e)}")
+            # Handle other HTTP errors
+            log_progress("❌ API Status Error: %s. Details: %s", e.status_code, e.args)
             return {
-                'error': f'API error: {str(e)}',
-                'original_request': request
+                'error': f'API Status Error: {e.status_code}. Details: {e.args}',
             }
-        except Exception as e:
-            log_progress(f"❌ Unexpected error: {str(e)}")
+        if isinstance(e, APIError):
+            log_progress("❌ API error: %s", e)
             return {
-                'error': f'Parsing failed: {str(e)}',
+                'error': f'API error: {str(e)}',
                 'original_request': request
             }
+        log_progress("❌ Unexpected error: %s", e)
+        return {
+            'error': f'Parsing failed: {str(e)}',
+            'original_request': request
+        }
     
     def select_best_track(self, results: List[Dict], target_title: str, 
                          target_artist: str = None, preferences: Dict = None) -> Optional[int]:
@@ -186,63 +726,137 @@ class ClaudeAPIClient:
             return None
             
         try:
-            log_progress(f"🎯 Selecting best track from {len(results)} results")
+            log_progress("🎯 Selecting best track from %d results", len(results))
             
-            # Use existing prompt template if available
-            try:
-                prompt = format_result_selection_title_prompt(
-                    title=target_title,
-                    artist=target_artist,
-                    preferences=preferences or {},
-                    results=results
-                )
-            except (NameError, ImportError):
-                # Fallback prompt if template not available
-                prompt = self.create_selection_prompt(results, target_title, target_artist, preferences)
-            
-            if not prompt:
+            params = self._track_selection_params(results, target_title, target_artist, preferences)
+            if not params:
                 log_progress("❌ Could not create selection prompt")
                 return None
             
-            # Add instructions for numeric response
-            full_prompt = f"""{prompt}
-
-IMPORTANT: Return ONLY the position number (integer), no explanation or other text."""
-            
             # Call Claude API
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=10,
-                temperature=0.0,  # Deterministic selection
-                messages=[{"role": "user", "content": full_prompt}]
-            )
-            
-            response_text = response.content[0].text.strip()
-            log_progress(f"📝 Selection response: '{response_text}'")
-            
-            # Parse the position number
-            try:
-                position = int(response_text.split()[0])  # Get first number
-                
-                # Validate position is in results
-                valid_positions = [r.get('position') for r in results if 'position' in r]
-                if position in valid_positions:
-                    log_progress(f"✅ Selected position: {position}")
-                    return position
-                else:
-                    log_progress(f"❌ Invalid position {position}, valid positions: {valid_positions[:5]}")
-                    return None
-                    
-            except (ValueError, IndexError) as e:
-                log_progress(f"❌ Could not parse position from: '{response_text}' - {str(e)}")
-                return None
+            return self._select_position(params, results)
                 
         except APIError as e:
-            log_progress(f"❌ API error in selection: {str(e)}")
+            log_progress("❌ API error in selection: %s", e)
             return None
         except Exception as e:
-            log_progress(f"❌ Unexpected error in selection: {str(e)}")
+            log_progress("❌ Unexpected error in selection: %s", e)
+            return None
+    
+    async def aselect_best_track(self, results: List[Dict], target_title: str,
+                                 target_artist: str = None, preferences: Dict = None) -> Optional[int]:
+        """
+        Async version of select_best_track.
+        
+        Selection is a single short call, so it runs select_best_track in a worker
+        thread on the shared sync client rather than keeping a second copy of the
+        select-and-retry logic.
+        
+        Returns:
+            Position number of best match, or None if no good match
+        """
+        return await asyncio.to_thread(self.select_best_track, results, target_title,
+                                       target_artist, preferences)
+    
+    def _track_selection_params(self, results: List[Dict], target_title: str,
+                                target_artist: str = None, preferences: Dict = None) -> Optional[Dict[str, Any]]:
+        """Build the messages.create() arguments for track selection, or None if no prompt."""
+        # Use existing prompt template if available
+        if _HAS_SELECTION_TEMPLATE:
+            prompt = format_result_selection_title_prompt(
+                title=target_title,
+                artist=target_artist,
+                preferences=preferences or {},
+                results=results
+            )
+        else:
+            # Fallback prompt if template not available
+            prompt = self.create_selection_prompt(results, target_title, target_artist, preferences)
+        
+        if not prompt:
             return None
+        
+        return self._selection_params(prompt)
+    
+    def _selection_params(self, prompt: str) -> Dict[str, Any]:
+        """Build the messages.create() arguments asking for a single position number."""
+        # Add instructions for numeric response
+        full_prompt = f"""{prompt}
+
+IMPORTANT: Return ONLY the position number (integer), no explanation or other text."""
+        
+        return {
+            'model': self.select_model,
+            'max_tokens': 10,
+            'temperature': 0.0,  # Deterministic selection
+            'messages': [{"role": "user", "content": full_prompt}]
+        }
+    
+    def _select_position(self, params: Dict[str, Any], results: List[Dict]) -> Optional[int]:
+        """Ask for a position with the select model, retrying once with the main model."""
+        try:
+            position = self._position_from_text(self._stream_position_text(params), results)
+            
+            if position is None and params['model'] != self.model:
+                log_progress("🔁 Retrying selection with %s", self.model)
+                response_text = self._stream_position_text({**params, 'model': self.model})
+                position = self._position_from_text(response_text, results)
+        except Exception:
+            self._record_selection_failure()
+            raise
+        self._select_failures = 0
+        return position
+    
+    def selection_available(self) -> bool:
+        """
+        Whether LLM selection should be attempted (a simple circuit breaker).
+        
+        After _SELECT_FAILURE_LIMIT consecutive failed or timed-out selection calls,
+        selection is skipped for _SELECT_COOLDOWN seconds; the next call after that
+        serves as a probe that either resets or re-trips the breaker.
+        """
+        if self._select_failures < _SELECT_FAILURE_LIMIT:
+            return True
+        return time.monotonic() - self._select_tripped_at >= _SELECT_COOLDOWN
+    
+    def _record_selection_failure(self) -> None:
+        """Count a failed selection call, tripping the breaker at the failure limit."""
+        self._select_failures += 1
+        if self._select_failures >= _SELECT_FAILURE_LIMIT:
+            self._select_tripped_at = time.monotonic()
+            log_progress("⚡ %d selection failures in a row - using programmatic selection for %.0fs",
+                         self._select_failures, _SELECT_COOLDOWN)
+    
+    def _stream_position_text(self, params: Dict[str, Any]) -> str:
+        """Stream a selection reply, closing the stream as soon as its leading number is complete."""
+        response_text = ""
+        with self.select_client.messages.stream(**params) as stream:
+            for text in stream.text_stream:
+                response_text += text
+                if _POSITION_SETTLED_RE.match(response_text):
+                    break
+        return response_text
+    
+    def _position_from_text(self, response_text: str, results: List[Dict]) -> Optional[int]:
+        """Extract and validate the position number from a selection reply."""
+        response_text = response_text.strip()
+        log_progress("📝 Selection response: '%s'", response_text)
+        
+        # Parse the position number from the first digits
+        match = _POSITION_RE.match(response_text)
+        if not match:
+            log_progress("❌ Could not parse position from: '%s'", response_text)
+            return None
+        position = int(match.group(1))
+        
+        # Validate position is in results
+        valid_positions = {r['position'] for r in results if 'position' in r}
+        if position in valid_positions:
+            log_progress("✅ Selected position: %d", position)
+            return position
+        
+        log_progress("❌ Invalid position %s, valid positions: %s", position, sorted(valid_positions)[:5])
+        return None
     
     def select_best_album(self, results: List[Dict], target_album: str, 
                          target_artist: str = None, preferences: Dict = None) -> Optional[int]:
@@ -264,17 +878,17 @@ IMPORTANT: Return ONLY the position number (integer), no explanation or other te
             return None
             
         try:
-            log_progress(f"🎯 Selecting best album from {len(results)} results")
+            log_progress("🎯 Selecting best album from %d results", len(results))
             
             # Use existing prompt template if available
-            try:
+            if _HAS_SELECTION_TEMPLATE:
                 prompt = format_result_selection_album_prompt(
                     album=target_album,
                     artist=target_artist,
                     preferences=preferences or {},
                     results=results
                 )
-            except (NameError, ImportError):
+            else:
                 # Fallback prompt if template not available
                 prompt = self.create_selection_prompt(results, target_album, target_artist, preferences)
             
@@ -282,44 +896,14 @@ IMPORTANT: Return ONLY the position number (integer), no explanation or other te
                 log_progress("❌ Could not create selection prompt")
                 return None
             
-            # Add instructions for numeric response
-            full_prompt = f"""{prompt}
-
-IMPORTANT: Return ONLY the position number (integer), no explanation or other text."""
-            
             # Call Claude API
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=10,
-                temperature=0.0,  # Deterministic selection
-                messages=[{"role": "user", "content": full_prompt}]
-            )
-            
-            response_text = response.content[0].text.strip()
-            log_progress(f"📝 Selection response: '{response_text}'")
-            
-            # Parse the position number
-            try:
-                position = int(response_text.split()[0])  # Get first number
-                
-                # Validate position is in results
-                valid_positions = [r.get('position') for r in results if 'position' in r]
-                if position in valid_positions:
-                    log_progress(f"✅ Selected position: {position}")
-                    return position
-                else:
-                    log_progress(f"❌ Invalid position {position}, valid positions: {valid_positions[:5]}")
-                    return None
-                    
-            except (ValueError, IndexError) as e:
-                log_progress(f"❌ Could not parse position from: '{response_text}' - {str(e)}")
-                return None
+            return self._select_position(self._selection_params(prompt), results)
                 
         except APIError as e:
-            log_progress(f"❌ API error in selection: {str(e)}")
+            log_progress("❌ API error in selection: %s", e)
             return None
         except Exception as e:
-            log_progress(f"❌ Unexpected error in selection: {str(e)}")
+            log_progress("❌ Unexpected error in selection: %s", e)
             return None
 
     def _fallback_parse(self, request: str, api_response: str) -> Dict[str, Any]:
@@ -331,55 +915,16 @@ IMPORTANT: Return ONLY the position number (integer), no explanation or other te
         """
         log_progress("🔄 Attempting fallback parsing...")
         
-        # Try to extract JSON from the API response text
-        import re
-        
         # Look for JSON-like structures in the response
-        json_match = re.search(r'\{[^}]*"title"[^}]*\}', api_response)
+        json_match = _JSON_RE.search(api_response)
         if json_match:
             try:
-                return json.loads(json_match.group())
-            except json.JSONDecodeError:
+                return _loads(json_match.group())
+            except ValueError:
                 pass
         
         # Regex fallback if API response is unusable
-        request_lower = request.lower().strip()
-        
-        # Remove common prefixes
-        request_lower = re.sub(r'^(play\s+|i\s+want\s+to\s+hear\s+|put\s+on\s+)', '', request_lower)
-        request_lower = re.sub(r'\s+', ' ', request_lower).strip()
-        
-        # Simple preferences detection
-        preferences = {}
-        if re.search(r'\blive\s+(version|recording)', request_lower):
-            preferences['prefer_live'] = True
-        elif re.search(r'\bacoustic\s+version', request_lower):
-            preferences['prefer_acoustic'] = True
-        
-        # Simple "by" pattern
-        by_match = re.search(r'^(.+?)\s+by\s+(.+)$', request_lower)
-        if by_match:
-            return {
-                'title': by_match.group(1).strip(),
-                'artist': by_match.group(2).strip(),
-                'preferences': preferences
-            }
-        
-        # Simple possessive pattern
-        poss_match = re.search(r"^(.+?)'s\s+(.+)$", request_lower)
-        if poss_match:
-            return {
-                'title': poss_match.group(2).strip(),
-                'artist': poss_match.group(1).strip(),
-                'preferences': preferences
-            }
-        
-        # Fallback: treat as title only
-        return {
-            'title': request_lower,
-            'artist': None,
-            'preferences': preferences
-        }
+        return _regex_parse(request)
     
     def create_selection_prompt(self, results: List[Dict], title: str, 
                                artist: str = None, preferences: Dict = None) -> str:
@@ -404,15 +949,11 @@ IMPORTANT: Return ONLY the position number (integer), no explanation or other te
                 preferences_text = ", ".join(prefs)
         
         # Format results list
-        results_lines = []
-        for result in results:
-            pos = result.get('position', '?')
-            title_text = result.get('title', 'Unknown')
-            artist_text_result = result.get('artist', 'Unknown')
-            album = result.get('album', 'Unknown')
-            results_lines.append(f"{pos}. {title_text} - {artist_text_result} - {album}")
-        
-        results_list = "\n".join(results_lines)
+        results_list = "\n".join(
+            f"{r.get('position', '?')}. {r.get('title', 'Unknown')} - "
+            f"{r.get('artist', 'Unknown')} - {r.get('album', 'Unknown')}"
+            for r in results
+        )
         
         return f"""You are a music expert selecting the best track from search results.
 
@@ -449,19 +990,27 @@ Return only the position number."""
                 'response_length': len(response.content[0].text)
             }
         except Exception as e:
-            log_progress(f"❌ API connection test failed: {str(e)}")
+            log_progress("❌ API connection test failed: %s", e)
             return {
                 'success': False,
                 'error': str(e),
                 'message': 'API connection failed'
             }
 
-# Convenience function to get an api client - not currently in use
+_SINGLETON: Optional[ClaudeAPIClient] = None
+_SINGLETON_LOCK = threading.Lock()
+
+
 def get_api_client() -> ClaudeAPIClient:
     """
-    Get a configured Claude API client.
+    Get the process-wide Claude API client.
     
-    Checks for API key in environment variables and creates client.
+    The client is created on first use (checking for the API key in environment
+    variables) and reused afterwards, so its connection pool and TLS sessions are
+    shared by every caller. The underlying anthropic clients are thread-safe, so the
+    agent's worker threads (e.g. speculative album lookups) can use it concurrently
+    without a lock. CLAUDE_MUSIC_PARSE_MODEL and CLAUDE_MUSIC_SELECT_MODEL
+    override the parse and select models (e.g. claude-haiku-4-5 for selection).
     
     Returns:
         ClaudeAPIClient instance
@@ -469,7 +1018,17 @@ def get_api_client() -> ClaudeAPIClient:
     Raises:
         ValueError: If no API key is found
     """
-    return ClaudeAPIClient()
+    global _SINGLETON
+    if _SINGLETON is None:
+        with _SINGLETON_LOCK:
+            if _SINGLETON is None:
+                overrides = {}
+                if _ENV_PARSE_MODEL:
+                    overrides['parse_model'] = _ENV_PARSE_MODEL
+                if _ENV_SELECT_MODEL:
+                    overrides['select_model'] = _ENV_SELECT_MODEL
+                _SINGLETON = ClaudeAPIClient(**overrides)
+    return _SINGLETON
 
 # Convenience functions that match the existing interface
 if __name__ == "__main__":
@@ -14,31 +14,548 @@ Currently, "sonos searchtrack" and sonos "select" are the sonos commands used.
 """
 
 # Unified MusicAgent class - contains all functionality previously split between base and derived classes
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, NamedTuple, Tuple
+import hashlib
 import json
 import sys
 import os
 import re
 import traceback
+import shutil
 import subprocess
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from difflib import SequenceMatcher
+from functools import lru_cache
+from operator import itemgetter
 
+try:
+    from rapidfuzz import fuzz as _fuzz, process as _fuzz_process
+except ImportError:
+    _fuzz = None  # rapidfuzz is optional; difflib is used instead
 
-def log_progress(message: str):
-    """Log progress to file for headless mode monitoring."""
-    timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]  # HH:MM:SS.mmm format
-    log_message = f"[{timestamp}] 🎵 Agent {message}"
+from music_cache import PersistentLRU, SemanticCache
+from progress_log import LOG_ENABLED, flush_progress_log, write_progress
+
+
+if LOG_ENABLED:
+    def log_progress(message: str, *args):
+        """Log progress to file for headless mode monitoring (`args` are %-formatted in)."""
+        write_progress("Agent", message % args if args else message)
+else:
+    def log_progress(message: str, *args):
+        """Progress logging is disabled (CLAUDE_MUSIC_LOG=0), so nothing is formatted."""
+
+
+# Patterns used per request and per search result, compiled once at import
+_WS_RE = re.compile(r'\s+')
+# Prefix removal and the "song by artist" split in one pass
+_FALLBACK_RE = re.compile(
+    r'^(?:play\s+|i\s+want\s+to\s+hear\s+|put\s+on\s+)?(?P<body>.*?)(?:\s+by\s+(?P<artist>.+))?$'
+)
+_PREFS_RE = re.compile(r'\b(?P<live>live\s+(?:version|recording))|\b(?P<acoustic>acoustic\s+version)')
+_POSS_RE = re.compile(r"^(.+?)'s\s+(.+)$")
+_SEARCH_LINE_RE = re.compile(r'^(\d+)\.\s+(.+?)-(.+?)-(.+)$')
+_OLD_SEARCH_LINE_RE = re.compile(r'^(\d+)\.\s+(.+?)-(.+)$')
+# Annotations stripped before matching; a trailing "- live" may be followed by other noise
+_NOISE_ANNOTATION = r'\(\d{4}\s*remaster(?:ed)?\)|\(live[^)\n]*\)|\[explicit\]'
+_NOISE_RE = re.compile(
+    rf'\s*(?:{_NOISE_ANNOTATION})|\s*-\s*live\s*(?=(?:{_NOISE_ANNOTATION}|\s)*$)', re.IGNORECASE
+)
+_NONWORD_RE = re.compile(r'[^\w\s]')
+_WORD_RE = re.compile(r'\w+')
+# Version detectors: one alternation each, with shared prefixes factored out
+_LIVE_RE = re.compile(r'\b(?:live|concert)\b|live\s+(?:from|at|recording)|artists\s+den|concert\s+version')
+_ACOUSTIC_RE = re.compile(r'\b(?:acoustic|unplugged)\b|acoustic\s+version|solo\s+acoustic|stripped')
+# Album names that might need LLM interpretation, matched in one scan per album
+_AMBIGUOUS_ALBUM_PATTERNS = (
+    'greatest hits', 'best of', 'collection', 'anthology',
+    'deluxe', 'remaster', 'anniversary', 'special edition'
+)
+# Substring matches like the patterns themselves, but tolerant of doubled spaces ("best  of")
+_AMBIGUOUS_ALBUM_RE = re.compile('|'.join(r'\s+'.join(map(re.escape, pattern.split()))
+                                          for pattern in _AMBIGUOUS_ALBUM_PATTERNS))
+# Quote characters that trip up sonos searches, deleted in one translate() pass
+_QUERY_SANITIZE = str.maketrans('', '', "'\"`\u2018\u2019\u201c\u201d")
+
+
+# Per-command timeouts (seconds) so a hung CLI call fails fast; others use the default
+_COMMAND_TIMEOUTS = {'searchtrack': 5, 'searchalbum': 5, 'select': 3, 'showqueue': 2, 'what': 2,
+                     'pause': 3, 'resume': 3}
+_DEFAULT_COMMAND_TIMEOUT = 10
+# What the sonos CLI prints when the music service's search response can't be parsed
+# (e.g. for "fixing her hair"); the sanitized fallback queries usually avoid it
+_API_PARSE_ERROR = "string indices must be integers"
+
+# `sonos select N` plays from the CLI's most recent search, so only that search can be
+# reused safely: a repeat of it within the TTL skips re-running the CLI
+_SEARCH_CACHE_TTL = 60.0
+_last_search = None  # (command tuple, monotonic timestamp, output)
+_last_search_lock = threading.RLock()  # Reentrant so a speculative search can hold it while it runs
+
+# Cap on concurrent sonos CLI processes when fallback queries run in parallel
+_MAX_PARALLEL_SEARCHES = 3
+# Upper bound on distinct queries tried per request (each one is a sonos subprocess)
+_MAX_SEARCH_QUERIES = 6
+# Rows ranked per search: the CLI has no result limit, but its list is ordered by the
+# music service's relevance, so rows past this rarely matter and are left unparsed
+_MAX_SEARCH_RESULTS = 20
+
+# Searches that produced no playable match recently (command tuple -> monotonic time),
+# oldest first, so an identical retry within the TTL can be skipped
+_FAILED_SEARCH_TTL = 60.0
+_FAILED_SEARCH_MAX = 256
+_failed_searches = OrderedDict()
+_failed_searches_lock = threading.Lock()
+
+
+def _search_recently_failed(command: List[str]) -> bool:
+    """Whether this exact search command found no match within the last _FAILED_SEARCH_TTL seconds."""
+    key = tuple(command)
+    with _failed_searches_lock:
+        failed_at = _failed_searches.get(key)
+        if failed_at is None:
+            return False
+        if time.monotonic() - failed_at > _FAILED_SEARCH_TTL:
+            del _failed_searches[key]
+            return False
+        return True
+
+
+def _remember_failed_searches(commands: List[List[str]]) -> None:
+    """Record search commands that found no match, evicting the oldest beyond _FAILED_SEARCH_MAX."""
+    now = time.monotonic()
+    with _failed_searches_lock:
+        for command in commands:
+            key = tuple(command)
+            _failed_searches[key] = now
+            _failed_searches.move_to_end(key)
+        while len(_failed_searches) > _FAILED_SEARCH_MAX:
+            _failed_searches.popitem(last=False)
+
+
+# Runs CLI commands whose output the caller doesn't need right away (see get_queue_async)
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sonos-background")
+
+# Album lookups for the API parse failure fallback, started as soon as a search reports
+# the failure so they overlap the remaining searches
+_album_lookups = ThreadPoolExecutor(max_workers=2, thread_name_prefix="album-lookup")
+
+# Album lookups rarely change, so answers are kept across sessions for a month
+_ALBUM_CACHE_TTL = 30 * 24 * 3600
+_ALBUM_LOOKUP_TIMEOUT = 5.0  # Seconds per API attempt, so a stalled call can't hang a search
+_album_cache = None  # PersistentLRU, opened on first lookup
+_album_semantic_caches: Dict[str, SemanticCache] = {}  # Per model, opened on first lookup
+_album_cache_lock = threading.Lock()
+# Requests that played successfully, replayed without query fan-out or selection; an entry
+# lives _RESOLVED_CACHE_TTL from its last verified use
+_RESOLVED_CACHE_TTL = 30 * 24 * 3600
+_resolved_cache = None  # PersistentLRU, opened on first use
+_resolved_cache_lock = threading.Lock()
+# A semantic hit must still be the same song: paraphrases and typos pass, while
+# "harvest" vs "harvest moon" (ratio 0.74) does not
+_ALBUM_SEMANTIC_THRESHOLD = 0.9
+_ALBUM_TITLE_MIN_RATIO = 0.85
+
+
+# The album lookup instructions and examples are a stable, cacheable prefix
+_ALBUM_LOOKUP_BRIEF = """Identify the primary album that contains each numbered song given in the user message.
+
+Return ONLY a JSON array of album name strings, one per song in the same order, nothing else. If a song appears on multiple albums, use the original studio album"""
+_ALBUM_LOOKUP_EXAMPLES = """ (not compilations, greatest hits, or live albums unless that's the only version).
+
+Examples:
+- "Harvest" by Neil Young → Harvest
+- "Comfortably Numb" by Pink Floyd → The Wall
+- "Fixing Her Hair" by Ani DiFranco → Imperfectly"""
+_ALBUM_BRIEF_LOOKUP_SYSTEM = [{
+    "type": "text",
+    "text": f"{_ALBUM_LOOKUP_BRIEF}.",
+    "cache_control": {"type": "ephemeral"},
+}]
+_ALBUM_BATCH_LOOKUP_SYSTEM = [{
+    "type": "text",
+    "text": _ALBUM_LOOKUP_BRIEF + _ALBUM_LOOKUP_EXAMPLES,
+    "cache_control": {"type": "ephemeral"},
+}]
+# Well-known songs don't need the examples, so lookups try the brief prompt first and
+# retry only unanswered songs with examples; CLAUDE_MUSIC_ALBUM_EXAMPLES=1 always sends them
+_ALBUM_LOOKUP_SYSTEMS = (
+    [_ALBUM_BATCH_LOOKUP_SYSTEM] if os.getenv('CLAUDE_MUSIC_ALBUM_EXAMPLES', '0') == '1'
+    else [_ALBUM_BRIEF_LOOKUP_SYSTEM, _ALBUM_BATCH_LOOKUP_SYSTEM]
+)
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+# Output budget per song: enough for a long album name plus its JSON quoting
+_ALBUM_LOOKUP_TOKENS = 25
+# Cached answers are only valid for the instructions that produced them, so the cache
+# namespace carries a digest of the lookup prompt; editing it starts a fresh namespace
+_ALBUM_CACHE_NAMESPACE = "album_lookup:" + hashlib.sha256(
+    (_ALBUM_LOOKUP_BRIEF + _ALBUM_LOOKUP_EXAMPLES).encode()).hexdigest()[:12]
+
+
+def _album_array(text: str) -> Optional[list]:
+    """The JSON array of album names in a (possibly partial) lookup reply, or None."""
+    match = _JSON_ARRAY_RE.search(text)
+    if not match:
+        return None
+    try:
+        found = json.loads(match.group(0))
+    except ValueError:
+        return None  # Incomplete, e.g. a "]" inside an album name
+    return found if isinstance(found, list) else None
+
+
+def _album_cache_key(model: str, title: str, artist: Optional[str]) -> str:
+    """Key album lookups by model and the casefolded, whitespace-collapsed title and artist."""
+    return f"{model}|{' '.join(title.casefold().split())}|{' '.join((artist or '').casefold().split())}"
+
+
+def _get_album_cache() -> PersistentLRU:
+    """Open (once per process) the persistent cache of album lookup answers."""
+    global _album_cache
+    with _album_cache_lock:
+        if _album_cache is None:
+            _album_cache = PersistentLRU(namespace=_ALBUM_CACHE_NAMESPACE, maxsize=1024,
+                                         db_filename="album_lookup.db")
+        return _album_cache
+
+
+def _get_album_semantic_cache(model: str) -> SemanticCache:
+    """Open (once per process and model) the embedding cache of album lookup answers."""
+    with _album_cache_lock:
+        cache = _album_semantic_caches.get(model)
+        if cache is None:
+            cache = SemanticCache(namespace=f"{_ALBUM_CACHE_NAMESPACE}|{model}",
+                                  threshold=_ALBUM_SEMANTIC_THRESHOLD, maxsize=1024,
+                                  db_filename="album_semantic_cache.db")
+            _album_semantic_caches[model] = cache
+        return cache
+
+
+def _same_song(entry: Dict[str, Any], title_clean: str, artist_clean: str) -> bool:
+    """Whether a cached album lookup was for (nearly) the same cleaned title and artist."""
+    if time.time() - entry['ts'] >= _ALBUM_CACHE_TTL:
+        return False
+    if artist_clean != entry['artist'] and not _tokens_contained(_word_tokens(artist_clean),
+                                                                 _word_tokens(entry['artist'])):
+        return False
+    return SequenceMatcher(None, title_clean, entry['title']).ratio() >= _ALBUM_TITLE_MIN_RATIO
+
+
+def _cached_album(model: str, title: str, artist: Optional[str]) -> Optional[str]:
+    """
+    Return a remembered album for a song, or None.
+    
+    Exact (normalized) keys are checked first; on a miss the song is looked up by
+    embedding similarity, so annotated or misspelled titles ("fixin her hair (live)")
+    reuse an earlier answer. The semantic tier is off without sentence-transformers.
+    """
+    cached = _get_album_cache().get(_album_cache_key(model, title, artist))
+    if cached and time.time() - cached['ts'] < _ALBUM_CACHE_TTL:
+        return cached['album']
     
-    # Write to log file for headless mode monitoring
+    title_clean, artist_clean = _clean_text(title), _clean_text(artist or "")
+    semantic = _get_album_semantic_cache(model)
+    if not semantic.enabled:
+        return None
     try:
-        log_file = os.path.expanduser(".claude_music_progress.log")
-        with open(log_file, "a") as f:
-            f.write(log_message + "\n")
-            f.flush()
-    except:
-        pass  # Don't fail if we can't write to file
-
-def handle_music_request(user_request: str, api_client=None, verbose: bool = False) -> str:
+        cached = semantic.lookup(semantic.encode(f"{title_clean} by {artist_clean}"),
+                                 accept=lambda entry: _same_song(entry, title_clean, artist_clean))
+    except Exception:
+        return None  # The semantic tier is best effort
+    return cached['album'] if cached else None
+
+
+def _remember_album(model: str, title: str, artist: Optional[str], album: str) -> None:
+    """Store an album lookup answer in the exact and semantic caches."""
+    now = time.time()
+    _get_album_cache().put(_album_cache_key(model, title, artist), {'album': album, 'ts': now})
+    
+    semantic = _get_album_semantic_cache(model)
+    if not semantic.enabled:
+        return
+    title_clean, artist_clean = _clean_text(title), _clean_text(artist or "")
+    key = f"{title_clean} by {artist_clean}"
+    try:
+        semantic.store(key, semantic.encode(key),
+                       {'album': album, 'title': title_clean, 'artist': artist_clean, 'ts': now})
+    except Exception:
+        pass
+
+
+def _resolved_key(album_search: bool, title: Optional[str], artist: Optional[str],
+                  album: Optional[str], preferences: Dict[str, Any]) -> str:
+    """Key a parsed request by search mode, normalized fields and active preferences."""
+    fields = (' '.join((field or '').casefold().split()) for field in (title, artist, album))
+    prefs = ','.join(sorted(name for name, value in preferences.items() if value))
+    return '|'.join(('album' if album_search else 'track', *fields, prefs))
+
+
+def _get_resolved_cache() -> PersistentLRU:
+    """Open (once per process) the persistent cache of requests that played successfully."""
+    global _resolved_cache
+    with _resolved_cache_lock:
+        if _resolved_cache is None:
+            _resolved_cache = PersistentLRU(namespace="resolved", maxsize=512,
+                                            db_filename="resolved_cache.db")
+        return _resolved_cache
+
+
+def _split_search_line(line: str) -> Optional[Tuple[int, List[str]]]:
+    """
+    Split a well-formed "N. title-artist-album" line without the regex engine.
+
+    Splits on the first two hyphens, like _SEARCH_LINE_RE; a line with a single hyphen
+    is the old "N. title-artist" format and gets 'Unknown Album', like _OLD_SEARCH_LINE_RE.
+    Returns None for anything else (e.g. empty fields) so the caller can fall back to
+    the regexes.
+    """
+    dot = line.find('.')
+    if dot <= 0 or not line[:dot].isdecimal() or not line[dot + 1:dot + 2].isspace():
+        return None
+    parts = line[dot + 1:].lstrip().split('-', 2)
+    if len(parts) < 2 or not all(parts):
+        return None
+    if len(parts) == 2:
+        parts.append('Unknown Album')
+    return int(line[:dot]), parts
+
+
+def _clean_text(text: str) -> str:
+    """Clean text for better matching by removing noise and normalizing."""
+    if not text:
+        return ""
+        
+    # Remove common annotations, then normalize whitespace and case
+    text = _NOISE_RE.sub('', text)
+    return _WS_RE.sub(' ', text.lower()).strip()
+
+
+_PUBLIC_RESULT_KEYS = ('position', 'title', 'artist', 'album', 'raw_line')
+
+
+def _public_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """A caller-owned copy of a search result without the private matching fields."""
+    return {key: result[key] for key in _PUBLIC_RESULT_KEYS if key in result}
+
+
+def _search_result(position: int, title: str, artist: str, album: str, raw_line: str) -> Dict[str, Any]:
+    """
+    Build one parsed search result.
+    
+    The casefolded and match-cleaned fields and the version flags are computed once here,
+    so scoring (possibly repeated) only reads them.
+    """
+    title, artist, album = title.strip(), artist.strip(), album.strip()
+    is_live, is_acoustic = _version_flags(title, album)
+    return {
+        'position': position,
+        'title': title,
+        'artist': artist,
+        'album': album,
+        'raw_line': raw_line,
+        '_title_cf': title.casefold(),
+        '_artist_cf': artist.casefold(),
+        '_album_cf': album.casefold(),
+        '_title_clean': _clean_text(title),
+        '_artist_clean': _clean_text(artist),
+        '_album_clean': _clean_text(album),
+        '_artist_tokens': _word_tokens(artist),
+        '_is_live': is_live,
+        '_is_acoustic': is_acoustic
+    }
+
+
+# Similarity gates: strings whose lengths differ this much can't be a useful match
+# (ratio is bounded by 2*lr/(1+lr)) and score 0.0, and rapidfuzz may stop early below
+# the cutoff
+_MIN_LENGTH_RATIO = 0.4
+_SIMILARITY_CUTOFF = 0.3
+
+
+def _length_ratio(str1: str, str2: str) -> float:
+    """Ratio of the shorter to the longer string length (1.0 for two empty strings)."""
+    longest = max(len(str1), len(str2))
+    return min(len(str1), len(str2)) / longest if longest else 1.0
+
+
+def _word_tokens(text: str) -> frozenset:
+    """Set of lowercase words in text, ignoring punctuation ("Springsteen, Bruce" -> {bruce, springsteen})."""
+    return frozenset(_WORD_RE.findall(_clean_text(text)))
+
+
+def _tokens_contained(tokens1: frozenset, tokens2: frozenset) -> bool:
+    """Whether one non-empty word set contains the other (e.g. an artist and "artist & band")."""
+    return bool(tokens1) and bool(tokens2) and (tokens1 <= tokens2 or tokens2 <= tokens1)
+
+
+@lru_cache(maxsize=1024)
+def _version_flags(title: str, album: str) -> Tuple[bool, bool]:
+    """Memoized (is_live, is_acoustic) for a (title, album) pair, lowercasing their text once."""
+    text = f"{title} {album}".lower()
+    return _LIVE_RE.search(text) is not None, _ACOUSTIC_RE.search(text) is not None
+
+
+def _version_score(is_live_track: bool, is_acoustic_track: bool, prefer_live: bool,
+                   prefer_acoustic: bool, prefer_studio: bool) -> float:
+    """Score adjustment for how well a result's version matches the preferences."""
+    is_studio_track = not is_live_track and not is_acoustic_track  # Studio is default
+    
+    if prefer_live:
+        if is_live_track:
+            return 0.3  # Significant bonus for live versions when requested
+        return -0.1  # Small penalty when live requested but not found
+    if prefer_acoustic:
+        if is_acoustic_track:
+            return 0.3  # Significant bonus for acoustic versions when requested
+        return -0.1  # Small penalty when acoustic requested but not found
+    if prefer_studio:
+        if is_studio_track:
+            return 0.2  # Bonus for studio when specifically requested
+        return -0.1  # Penalty when studio requested but not found
+    
+    # Default preference: slightly prefer studio versions
+    if is_studio_track:
+        return 0.1  # Small bonus for studio
+    if is_live_track:
+        return -0.05  # Very small penalty for live when not requested
+    return 0.05  # Neutral for acoustic
+
+
+@lru_cache(maxsize=None)
+def _version_bonus_table(prefer_live: bool, prefer_acoustic: bool,
+                         prefer_studio: bool) -> Dict[Tuple[bool, bool], float]:
+    """Version adjustment for each (is_live, is_acoustic) pair, built once per preference set."""
+    return {(live, acoustic): _version_score(live, acoustic, prefer_live, prefer_acoustic, prefer_studio)
+            for live in (False, True) for acoustic in (False, True)}
+
+
+def _score_batch(name_scores: List[float], artist_scores: List[float], is_live: Tuple[bool, ...],
+                 is_acoustic: Tuple[bool, ...], prefer_live: bool, prefer_acoustic: bool,
+                 prefer_studio: bool, has_artist: bool) -> List[float]:
+    """
+    Combine per-result name/artist scores and version flags into final scores.
+    
+    The version adjustment depends only on the two flags, so it is looked up from a
+    four-entry table instead of re-running the preference branches for every row.
+    """
+    bonus = _version_bonus_table(bool(prefer_live), bool(prefer_acoustic), bool(prefer_studio))
+    if has_artist:
+        return [max(0.0, min(1.0, (name * 0.6) + (artist * 0.3) + bonus[live, acoustic] + 0.1))
+                for name, artist, live, acoustic in zip(name_scores, artist_scores, is_live, is_acoustic)]
+    return [max(0.0, min(1.0, (name * 0.8) + bonus[live, acoustic] + 0.2))
+            for name, live, acoustic in zip(name_scores, is_live, is_acoustic)]
+
+
+class _SearchColumns(NamedTuple):
+    """Search results as parallel columns (struct of arrays) for scoring."""
+    positions: Tuple[int, ...]
+    titles_clean: Tuple[str, ...]
+    artists_clean: Tuple[str, ...]
+    albums_clean: Tuple[str, ...]
+    artist_tokens: Tuple[frozenset, ...]
+    is_live: Tuple[bool, ...]
+    is_acoustic: Tuple[bool, ...]
+
+    @classmethod
+    def from_results(cls, results: List[Dict[str, Any]]) -> "_SearchColumns":
+        """Transpose parse_search_results() dicts into columns in a single pass."""
+        if not results:
+            return cls((), (), (), (), (), (), ())
+        # Results built elsewhere lack the precomputed fields, so derive them here
+        rows = (r if '_title_clean' in r else
+                _search_result(r['position'], r['title'], r['artist'], r['album'], r.get('raw_line', ''))
+                for r in results)
+        return cls(*zip(*((r['position'], r['_title_clean'], r['_artist_clean'], r['_album_clean'],
+                           r['_artist_tokens'], r['_is_live'], r['_is_acoustic']) for r in rows)))
+
+
+@lru_cache(maxsize=32)
+def _parse_search_output(search_output: str, limit: Optional[int] = None) -> Tuple[Dict[str, Any], ...]:
+    """
+    Parse sonos search output (memoized, since the same output is often seen again).
+    
+    Repeated requests, reused speculative searches and overlapping fallback queries
+    hand back identical output, which then skips the line splitting and cleaning.
+    Parsing stops once `limit` results have been found.
+    """
+    results = []
+    
+    for line in search_output.split('\n'):
+        if limit is not None and len(results) >= limit:
+            break
+        line = line.strip()
+        if not line:
+            continue
+        # Match pattern: "number. Title-Artist-Album"
+        # Note that LLM could probably just use raw_line but algorithmic
+        # matching requires structured fields.
+        fields = _split_search_line(line)
+        if fields is not None:
+            position, (title, artist, album) = fields
+            results.append(_search_result(position, title, artist, album, line))
+            continue
+
+        # The three-field regex needs two hyphens; anything less can only be the old format
+        match = _SEARCH_LINE_RE.match(line) if line.count('-') >= 2 else None
+        if match:
+            results.append(_search_result(int(match.group(1)), match.group(2),
+                                          match.group(3), match.group(4), line))
+        else:
+            # Fallback for old format without album
+            old_match = _OLD_SEARCH_LINE_RE.match(line)
+            if old_match:
+                results.append(_search_result(int(old_match.group(1)), old_match.group(2),
+                                              old_match.group(3), 'Unknown Album', line))
+    
+    return tuple(results)
+
+
+def _reusable_search_output(key: Tuple[str, ...]) -> Optional[str]:
+    """Output of the CLI's last search if it was `key` and is still fresh (caller holds _last_search_lock)."""
+    if (_last_search is not None and _last_search[0] == key
+            and time.monotonic() - _last_search[1] < _SEARCH_CACHE_TTL):
+        return _last_search[2]
+    return None
+
+
+@lru_cache(maxsize=None)
+def _resolve_executable(name: str) -> str:
+    """Resolve a CLI name to its full path once per process (the name itself if not on PATH)."""
+    return shutil.which(name) or name
+
+def _start_speculative_search(agent: "MusicAgent", title: str, artist: str) -> threading.Thread:
+    """
+    Start a track search for a guessed title/artist while the LLM parse is in flight.
+    
+    If the final parse produces the same query, search_match_play reuses the output via
+    run_search; otherwise its search waits for this one to finish first, so the CLI's
+    last search list is always the one `sonos select` should use.
+    
+    Returns:
+        The running thread
+    """
+    query = agent.generate_search_queries(title, artist, None, {})[0]
+    command = ['sonos', 'searchtrack', *query]
+    holding = threading.Event()
+    
+    def search():
+        # Hold the search lock before the caller continues so no later search can run first
+        with _last_search_lock:
+            holding.set()
+            agent.run_search(command)
+    
+    if LOG_ENABLED:
+        log_progress("Speculative search while parsing: '%s'", ' '.join(query))
+    thread = threading.Thread(target=search, daemon=True)
+    thread.start()
+    holding.wait()
+    return thread
+
+def handle_music_request(user_request: str, api_client=None, verbose: bool = False,
+                         speculative_search: bool = True, include_queue: bool = False) -> str:
     """
     Complete end-to-end music request handler using Claude API.
     
@@ -49,6 +566,11 @@ def handle_music_request(user_request: str, api_client=None, verbose: bool = Fal
         user_request: Natural language music request (e.g., "play Bruce Springsteen's Thunder Road")
         api_client: Optional Claude API client (will create one if not provided)
         verbose: Whether to return detailed information about the process
+        speculative_search: Whether to start searching for the regex parse of the request
+                            while the LLM parse is in progress
+        include_queue: Whether to append the current queue (an extra `sonos showqueue` call)
+                       to the success message; see MusicAgent.get_queue_async for a
+                       non-blocking alternative
         
     Returns:
         Human-readable message about the result
@@ -58,26 +580,36 @@ def handle_music_request(user_request: str, api_client=None, verbose: bool = Fal
     """
 
     log_progress("handle_music_request")
+    start_ns = time.perf_counter_ns()
 
     try:
-        start_time = datetime.now()
-        
         # Show process info for debugging
         import os
         pid = os.getpid()
-        log_progress(f"🎯 Processing music request: '{user_request}' (PID: {pid})")
+        log_progress("🎯 Processing music request: '%s' (PID: %s)", user_request, pid)
         
         # Step 1: Create agent with API client
         log_progress("Step 1: Create agent with API client")
         agent = MusicAgent(api_client=api_client)
+        on_fields = None
+        if speculative_search:
+            # Simple "song by artist" requests can be searched right away from the regex
+            # parse; otherwise search as soon as the streamed LLM parse has title and artist
+            guess = _fallback_simple_parse(user_request)
+            if guess['artist'] and not guess['preferences']:
+                _start_speculative_search(agent, guess['title'], guess['artist'])
+            else:
+                def on_fields(partial):
+                    if partial.get('title'):
+                        _start_speculative_search(agent, partial['title'], partial.get('artist'))
         
         # Step 2: Parse the natural language request using API
         log_progress("Step 2: Parse the natural language request using API")
-        parsed = agent.parse_music_request(user_request)
+        parsed = agent.parse_music_request(user_request, on_fields=on_fields)
         
         # Handle parsing errors
         if 'error' in parsed:
-            log_progress(f"Parsing failed: {parsed['error']}")
+            log_progress("Parsing failed: %s", parsed['error'])
             return f"❌ Could not understand request: {parsed['error']}"
         
         title = parsed.get('title')
@@ -85,7 +617,7 @@ def handle_music_request(user_request: str, api_client=None, verbose: bool = Fal
         album = parsed.get('album')
         preferences = parsed.get('preferences', {})
 
-        log_progress(f"Parsed: title='{'title'}', artist='{'artist'}', album='{'album'}' preferences={preferences}")
+        log_progress("Parsed: title='%s', artist='%s', album='%s' preferences=%s", title, artist, album, preferences)
 
         if not parsed['title']:
             log_progress("No title parsed from request - presumed to be an album request")
@@ -96,8 +628,8 @@ def handle_music_request(user_request: str, api_client=None, verbose: bool = Fal
         result = agent.search_match_play(title, artist, album, preferences)
         
         # Calculate total time
-        elapsed = (datetime.now() - start_time).total_seconds()
-        log_progress(f"Completed in {elapsed:.2f} seconds")
+        elapsed = (time.perf_counter_ns() - start_ns) / 1e9
+        log_progress("Completed in %.2f seconds", elapsed)
         
         # Convert agent result to user-friendly message
         if result['success']:
@@ -109,9 +641,11 @@ def handle_music_request(user_request: str, api_client=None, verbose: bool = Fal
                 if 'total_results' in details:
                     message += f"\n(Found {details['total_results']} total results)"
                 return message
-            else:
+            elif include_queue:
                 queue_result = agent.execute_sonos_command(['sonos', 'showqueue'])
                 return result['message'] + "\n\nCurrent Queue:\n" + queue_result['output']
+            else:
+                return result['message']
         else:
             if verbose:
                 error_details = result.get('details', {})
@@ -123,9 +657,13 @@ def handle_music_request(user_request: str, api_client=None, verbose: bool = Fal
                 return f"❌ {result['message']}"
         
     except Exception as e:
-        elapsed = (datetime.now() - start_time).total_seconds() if 'start_time' in locals() else 0
-        log_progress(f"Failed after {elapsed:.2f} seconds: {str(e)}")
+        elapsed = (time.perf_counter_ns() - start_ns) / 1e9
+        log_progress("Failed after %.2f seconds: %s", elapsed, e)
         return f"❌ Unexpected error processing music request: {str(e)}"
+    finally:
+        # Lines are written by a background thread; make sure this request's are on disk
+        # before returning so a headless monitor sees the whole request
+        flush_progress_log()
 
 
 def _fallback_simple_parse(user_request: str) -> Dict[str, Any]:
@@ -134,30 +672,26 @@ def _fallback_simple_parse(user_request: str) -> Dict[str, Any]:
     
     This handles basic patterns like "song by artist" and "artist's song".
     """
-    request_lower = user_request.lower().strip()
-    
-    # Remove common prefixes
-    request_lower = re.sub(r'^(play\s+|i\s+want\s+to\s+hear\s+|put\s+on\s+)', '', request_lower)
-    request_lower = re.sub(r'\s+', ' ', request_lower).strip()
+    request_lower = _WS_RE.sub(' ', user_request.lower()).strip()
+    match = _FALLBACK_RE.match(request_lower)
+    body, artist = match.group('body'), match.group('artist')
     
     # Simple preferences detection
     preferences = {}
-    if re.search(r'\blive\s+(version|recording)', request_lower):
-        preferences['prefer_live'] = True
-    elif re.search(r'\bacoustic\s+version', request_lower):
-        preferences['prefer_acoustic'] = True
+    prefs_match = _PREFS_RE.search(request_lower)
+    if prefs_match:
+        preferences['prefer_live' if prefs_match.group('live') else 'prefer_acoustic'] = True
     
     # Simple "by" pattern
-    by_match = re.search(r'^(.+?)\s+by\s+(.+)$', request_lower)
-    if by_match:
+    if artist:
         return {
-            'title': by_match.group(1).strip(),
-            'artist': by_match.group(2).strip(),
+            'title': body,
+            'artist': artist,
             'preferences': preferences
         }
     
     # Simple possessive pattern
-    poss_match = re.search(r"^(.+?)'s\s+(.+)$", request_lower)
+    poss_match = _POSS_RE.search(body)
     if poss_match:
         return {
             'title': poss_match.group(2).strip(),
@@ -167,7 +701,7 @@ def _fallback_simple_parse(user_request: str) -> Dict[str, Any]:
     
     # Fallback: treat as title only
     return {
-        'title': request_lower,
+        'title': body,
         'artist': None,
         'preferences': preferences
     }
@@ -198,12 +732,10 @@ class MusicAgent:
         # Initialize API client for LLM capabilities
         if api_client is None:
             try:
-                #from claude_api_client import get_api_client
-                from claude_api_client import ClaudeAPIClient
-                #api_client = get_api_client()
-                api_client = ClaudeAPIClient()  
+                from claude_api_client import get_api_client
+                api_client = get_api_client()
             except Exception as e:
-                log_progress(f"❌ Could not initialize API client: {e}")
+                log_progress("❌ Could not initialize API client: %s", e)
                 api_client = None
         self.api_client = api_client
     
@@ -215,93 +747,186 @@ class MusicAgent:
         """
         Execute a sonos CLI command and return the result.
         
+        Each call runs the CLI as a fresh process, not soco in-process: the CLI searches the
+        streaming service and keeps the result list `sonos select` plays from, so output is
+        captured whole rather than cut short.
+        
         Args:
             command: List of command parts (e.g., ['sonos', 'searchtrack', 'harvest', 'neil', 'young'])
             
         Returns:
-            Dict containing 'success', 'output', and 'error' keys
+            Dict containing 'success', 'output', and 'error' keys ('api_parse_error' is
+            also True when a completed command failed with the CLI's API parsing error)
         """
-        start_time = datetime.now()
-        command_str = ' '.join(command)
-        log_progress(f"Executing: {command_str}")
+        start_ns = time.perf_counter_ns()
+        if LOG_ENABLED:
+            log_progress("Executing: %s", ' '.join(command))
+        timeout = _COMMAND_TIMEOUTS.get(command[1] if len(command) > 1 else '', _DEFAULT_COMMAND_TIMEOUT)
         
         try:
+            # Exec the resolved path directly so each call skips the PATH search; with
+            # close_fds=False subprocess can use posix_spawn instead of walking the fd table
             result = subprocess.run(
-                command,
+                [_resolve_executable(command[0])] + command[1:],
                 capture_output=True,
                 text=True,
-                timeout=30
+                timeout=timeout,
+                close_fds=False
             )
             
-            elapsed = (datetime.now() - start_time).total_seconds()
+            elapsed = (time.perf_counter_ns() - start_ns) / 1e9
             if result.returncode == 0:
-                log_progress(f"Command completed ({elapsed:.2f}s)")
-            else:
-                log_progress(f"Command failed ({elapsed:.2f}s): {result.stderr.strip() if result.stderr else 'Unknown error'}")
+                log_progress("Command completed (%.2fs)", elapsed)
             
+            error = result.stderr.strip() if result.stderr else None
+            if result.returncode != 0:
+                log_progress("Command failed (%.2fs): %s", elapsed, error or 'Unknown error')
             return {
                 'success': result.returncode == 0,
                 'output': result.stdout.strip(),
-                'error': result.stderr.strip() if result.stderr else None
+                'error': error,
+                # Classified once here so callers don't rescan the error text
+                'api_parse_error': result.returncode != 0 and error is not None and _API_PARSE_ERROR in error
             }
             
         except subprocess.TimeoutExpired:
-            elapsed = (datetime.now() - start_time).total_seconds()
-            log_progress(f"Command timed out ({elapsed:.2f}s)")
+            elapsed = (time.perf_counter_ns() - start_ns) / 1e9
+            log_progress("Command timed out (%.2fs)", elapsed)
             return {
                 'success': False,
                 'output': '',
-                'error': 'Command timed out after 30 seconds'
+                'error': f'Command timed out after {timeout} seconds'
             }
         except Exception as e:
-            elapsed = (datetime.now() - start_time).total_seconds()
-            log_progress(f"Command error ({elapsed:.2f}s): {str(e)}")
+            elapsed = (time.perf_counter_ns() - start_ns) / 1e9
+            log_progress("Command error (%.2fs): %s", elapsed, e)
             return {
                 'success': False,
                 'output': '',
                 'error': str(e)
             }
     
-    def parse_search_results(self, search_output: str) -> List[Dict[str, Any]]:
+    def run_search(self, command: List[str]) -> Dict[str, Any]:
+        """
+        Execute a sonos search command, reusing the previous output for an identical repeat.
+        
+        Only the most recent search is reused (and only within _SEARCH_CACHE_TTL seconds),
+        because `sonos select` plays from whatever list the CLI searched last.
+        
+        Args:
+            command: Search command parts (e.g., ['sonos', 'searchtrack', 'harvest'])
+            
+        Returns:
+            Dict containing 'success', 'output', and 'error' keys
+        """
+        global _last_search
+        key = tuple(command)
+        with _last_search_lock:
+            output = _reusable_search_output(key)
+            if output is not None:
+                if LOG_ENABLED:
+                    log_progress("⚡ Reusing results of the last search: %s", ' '.join(command))
+                return {'success': True, 'output': output, 'error': None}
+            
+            result = self.execute_sonos_command(command)
+            _last_search = (key, time.monotonic(), result['output']) if result['success'] else None
+            return result
+    
+    def _start_searches(self, commands: List[List[str]]) -> Tuple[List[Future], List[int]]:
+        """
+        Start the search commands concurrently (a single command just runs via run_search).
+        
+        At most _MAX_PARALLEL_SEARCHES CLI processes run at a time; later commands queue
+        and are cancelled by _settle_searches if an earlier one is accepted first.
+        
+        Must be called with _last_search_lock held, and followed by _settle_searches.
+        
+        Args:
+            commands: Search commands in priority order
+            
+        Returns:
+            Tuple of (futures in command order, command indices in the order they finished)
+        """
+        if not commands:
+            return [], []
+        if len(commands) == 1:
+            future = Future()
+            future.set_result(self.run_search(commands[0]))
+            return [future], [0]
+        
+        finish_order = []
+        order_lock = threading.Lock()
+        
+        def search(index):
+            result = self.execute_sonos_command(commands[index])
+            with order_lock:
+                finish_order.append(index)
+            return result
+        
+        pool = ThreadPoolExecutor(max_workers=min(len(commands), _MAX_PARALLEL_SEARCHES),
+                                  thread_name_prefix="sonos-search")
+        futures = [pool.submit(search, index) for index in range(len(commands))]
+        pool.shutdown(wait=False)  # Workers exit once their search is done
+        return futures, finish_order
+    
+    def _settle_searches(self, commands: List[List[str]], searches: List[Future],
+                         finish_order: List[int], accepted: Optional[int]) -> Optional[str]:
+        """
+        Wait out concurrent searches and make sure the CLI's last search is the accepted one.
+        
+        `sonos select` plays from whichever search finished last, so if another query
+        finished after the accepted one, the accepted search is run again.
+        
+        Args:
+            commands: Commands passed to _start_searches
+            searches: Futures returned by _start_searches
+            finish_order: Finish order returned by _start_searches
+            accepted: Index of the search whose results will be played (None if none)
+            
+        Returns:
+            The re-run output if it differs from what was scored, otherwise None
+        """
+        global _last_search
+        if len(commands) <= 1:
+            return None  # run_search already tracked it
+        
+        for future in searches:
+            future.cancel()  # Queued searches never reach the CLI; running ones can't be stopped
+        wait(searches)
+        if accepted is None:
+            _last_search = None
+            return None
+        
+        output = searches[accepted].result()['output']
+        if finish_order[-1] != accepted:
+            log_progress("Re-running the selected search so `sonos select` uses its results")
+            result = self.execute_sonos_command(commands[accepted])
+            if not result['success']:
+                _last_search = None
+                return None
+            if result['output'] != output:
+                output = result['output']
+                _last_search = (tuple(commands[accepted]), time.monotonic(), output)
+                return output
+        _last_search = (tuple(commands[accepted]), time.monotonic(), output)
+        return None
+    
+    def parse_search_results(self, search_output: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Parse sonos searchtrack output into structured data.
         
         Args:
             search_output: Raw output from sonos searchtrack command
+            limit: Keep only the first `limit` results (positions are unchanged, so
+                   `sonos select` still plays the right row); None keeps them all
             
         Returns:
-            List of track dictionaries with position, title, artist, album
+            List of track dictionaries with position, title, artist, album (plus
+            private casefolded/cleaned copies and version flags for matching)
         """
         log_progress("Parse_search_results")
-        results = []
-        lines = search_output.strip().split('\n')
-        
-        for line in lines:
-            # Match pattern: "number. Title-Artist-Album"
-            # Note that LLM could probably just use raw_line but algorithmic
-            # matching requires structured fields.
-            match = re.match(r'^(\d+)\.\s+(.+?)-(.+?)-(.+)$', line.strip())
-            if match:
-                results.append({
-                    'position': int(match.group(1)),
-                    'title': match.group(2).strip(),
-                    'artist': match.group(3).strip(),
-                    'album': match.group(4).strip(),
-                    'raw_line': line.strip()
-                })
-            else:
-                # Fallback for old format without album
-                old_match = re.match(r'^(\d+)\.\s+(.+?)-(.+)$', line.strip())
-                if old_match:
-                    results.append({
-                        'position': int(old_match.group(1)),
-                        'title': old_match.group(2).strip(),
-                        'artist': old_match.group(3).strip(),
-                        'album': 'Unknown Album',
-                        'raw_line': line.strip()
-                    })
-        
-        return results
+        # The memoized rows are shared between calls, so callers get their own copies
+        return [dict(result) for result in _parse_search_output(search_output, limit)]
         
     def get_current_track_info(self) -> Dict[str, Any]:
         """Get information about currently playing track."""
@@ -309,6 +934,15 @@ class MusicAgent:
         return result
   # not really necessary since can just do self.execute_sonos_command(['sonos', 'playtrackfromlist', str(position)])  
   # without creating a separate method just like we're doing with searchtrack
+    def get_queue_async(self) -> Future:
+        """
+        Fetch the current queue in the background.
+        
+        Returns:
+            Future resolving to the execute_sonos_command result for `sonos showqueue`
+        """
+        return _background.submit(self.execute_sonos_command, ['sonos', 'showqueue'])
+    
     def play_track_by_position(self, position: int) -> Dict[str, Any]:
         """Play a track by its position from the last search results."""
         #result = self.execute_sonos_command(['sonos', 'playtrackfromlist', str(position)])
@@ -319,7 +953,7 @@ class MusicAgent:
     # Parsing Methods (API-powered with fallback)
     # ============================================================================
     
-    def parse_music_request(self, request: str) -> Dict[str, Any]:
+    def parse_music_request(self, request: str, on_fields=None) -> Dict[str, Any]:
         """
         Parse a natural language music request using Claude API.
         
@@ -328,6 +962,8 @@ class MusicAgent:
         
         Args:
             request: Natural language music request (e.g., "play Bruce Springsteen's Thunder Road")
+            on_fields: Optional callback for the streamed partial parse (see
+                       ClaudeAPIClient.parse_music_request)
             
         Returns:
             Dict with parsed components: {'title': str|None, 'artist': str|None, 
@@ -338,15 +974,18 @@ class MusicAgent:
             return _fallback_simple_parse(request)
         
         log_progress("parse_music_request")
-        log_progress(f"🎯 Parsing with API: '{request[:50]}...'")
+        log_progress("🎯 Parsing with API: '%.50s...'", request)
         
         try:
             # Use the API client for reliable parsing
-            result = self.api_client.parse_music_request(request)
+            if on_fields is not None:
+                result = self.api_client.parse_music_request(request, on_fields=on_fields)
+            else:
+                result = self.api_client.parse_music_request(request)
             
             # Check for API errors
             if 'error' in result:
-                log_progress(f"❌ API parsing error: {result['error']}")
+                log_progress("❌ API parsing error: %s", result['error'])
                 log_progress("🔄 Falling back to simple regex parsing")
                 return _fallback_simple_parse(request)
             
@@ -354,7 +993,7 @@ class MusicAgent:
             return result
             
         except Exception as e:
-            log_progress(f"❌ Unexpected error in API parsing: {str(e)}")
+            log_progress("❌ Unexpected error in API parsing: %s", e)
             log_progress("🔄 Falling back to simple regex parsing")
             return _fallback_simple_parse(request)
 
@@ -362,72 +1001,47 @@ class MusicAgent:
     # LLM-Powered Selection Method (when API available)
     # ============================================================================
     
-    def llm_select_best_match_track(self, results, target_title: str, 
-                              target_artist: str = None, target_album: str = None, preferences = None):
+    def llm_select_best_match(self, results, target_title: str = None, target_artist: str = None,
+                              target_album: str = None, preferences = None, mode: str = "track"):
         """
         Use Claude API for reliable LLM-powered result selection.
         
         This method now uses direct API calls for consistent selection behavior
         without the mock response issues of the Task function approach.
-        """
-        if not self.api_client:
-            log_progress("❌ No API client available for LLM selection")
-            return None
-            
-        log_progress(f"🎯 Using API for track selection from {len(results)} results")
         
-        try:
-            # Use the API client for reliable selection
-            position = self.api_client.select_best_track(
-                results=results,
-                target_title=target_title, 
-                target_artist=target_artist,
-                preferences=preferences or {}
-            )
+        Args:
+            results: Parsed search results
+            target_title: Target track title (track mode)
+            target_artist: Target artist name (optional)
+            target_album: Target album name (album mode)
+            preferences: User preferences dict (optional)
+            mode: "track" to match on the title, "album" to match on the album name
             
-            if position:
-                log_progress(f"✅ API selected position: {position}")
-                return position
-            else:
-                log_progress("❌ API selection returned no result")
-                return None
-                
-        except Exception as e:
-            log_progress(f"❌ API selection error: {str(e)}")
-            return None
-
-    def llm_select_best_match_album(self, results, target_title: str, 
-                              target_artist: str = None, target_album: str = None, preferences = None):
-        """
-        Use Claude API for reliable LLM-powered result selection.
-        
-        This method now uses direct API calls for consistent selection behavior
-        without the mock response issues of the Task function approach.
+        Returns:
+            Selected position, or None
         """
         if not self.api_client:
             log_progress("❌ No API client available for LLM selection")
             return None
             
-        log_progress(f"🎯 Using API for album selection from {len(results)} results")
+        log_progress("🎯 Using API for %s selection from %d results", mode, len(results))
         
         try:
             # Use the API client for reliable selection
-            position = self.api_client.select_best_album(
-                results=results,
-                target_album=target_album,
-                target_artist=target_artist,
-                preferences=preferences or {}
-            )
+            if mode == "album":
+                position = self.api_client.select_best_album(results, target_album, target_artist, preferences or {})
+            else:
+                position = self.api_client.select_best_track(results, target_title, target_artist, preferences or {})
             
             if position:
-                log_progress(f"✅ API selected position: {position}")
+                log_progress("✅ API selected position: %s", position)
                 return position
             else:
                 log_progress("❌ API selection returned no result")
                 return None
                 
         except Exception as e:
-            log_progress(f"❌ API selection error: {str(e)}")
+            log_progress("❌ API selection error: %s", e)
             return None
 
     # ============================================================================
@@ -436,23 +1050,41 @@ class MusicAgent:
     
     def _calculate_similarity(self, str1: str, str2: str) -> float:
         """Calculate simple similarity between two strings."""
-        from difflib import SequenceMatcher
+        length_ratio = _length_ratio(str1, str2)
+        if length_ratio < _MIN_LENGTH_RATIO:
+            return 0.0  # Obvious non-match; skip the full comparison
+        if _fuzz is not None:
+            return _fuzz.ratio(str1, str2, score_cutoff=_SIMILARITY_CUTOFF * 100) / 100.0
         return SequenceMatcher(None, str1, str2).ratio()
+    
+    def _similarities(self, target: str, candidates: List[str]) -> List[float]:
+        """Similarity of each candidate to target, in one rapidfuzz call when possible."""
+        scores = [0.0] * len(candidates)  # Pairs failing the length gate are non-matches
+        compare = [i for i, candidate in enumerate(candidates)
+                   if _length_ratio(candidate, target) >= _MIN_LENGTH_RATIO]
+        if not compare:
+            return scores
+
+        if _fuzz is not None:
+            try:
+                matrix = _fuzz_process.cdist([target], [candidates[i] for i in compare],
+                                             scorer=_fuzz.ratio,
+                                             score_cutoff=_SIMILARITY_CUTOFF * 100)
+                for i, score in zip(compare, matrix[0].tolist()):
+                    scores[i] = score / 100.0
+                return scores
+            except ImportError:
+                pass  # cdist needs numpy
+        # difflib caches its analysis of the second sequence, so hold the target there
+        matcher = SequenceMatcher(None, "", target)
+        for i in compare:
+            matcher.set_seq1(candidates[i])
+            scores[i] = matcher.ratio()
+        return scores
         
     def _clean_for_matching(self, text: str) -> str:
         """Clean text for better matching by removing noise and normalizing."""
-        if not text:
-            return ""
-            
-        # Remove common annotations
-        text = re.sub(r'\s*\(\d{4}\s*remaster(ed)?\)', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\s*\(live.*?\)', '', text, flags=re.IGNORECASE) 
-        text = re.sub(r'\s*\[explicit\]', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\s*-\s*live\s*$', '', text, flags=re.IGNORECASE)
-        
-        # Normalize whitespace and case
-        text = re.sub(r'\s+', ' ', text.lower().strip())
-        return text
+        return _clean_text(text)
         
     def _normalize_for_exact_match(self, text: str) -> str:
         """Normalize text for exact matching by removing all punctuation and extra spaces."""
@@ -460,181 +1092,132 @@ class MusicAgent:
             return ""
         
         # Remove all punctuation and normalize spacing
-        normalized = re.sub(r'[^\w\s]', '', text.lower())
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
+        normalized = _NONWORD_RE.sub('', text.lower())
+        normalized = _WS_RE.sub(' ', normalized).strip()
         return normalized
 
     def _detect_live_version(self, title: str, album: str) -> bool:
         """Detect if a track is a live version based on title and album context."""
-        live_patterns = [
-            r'\blive\b', r'\bconcert\b', r'live\s+from', r'live\s+at', r'artists\s+den',
-            r'live\s+recording', r'concert\s+version'
-        ]
-        
-        text_to_check = f"{title} {album}".lower()
-        return any(re.search(pattern, text_to_check) for pattern in live_patterns)
+        return _version_flags(title, album)[0]
     
     def _detect_acoustic_version(self, title: str, album: str) -> bool:
         """Detect if a track is an acoustic version based on title and album context."""
-        acoustic_patterns = [
-            r'\bacoustic\b', r'\bunplugged\b', r'acoustic\s+version',
-            r'stripped', r'solo\s+acoustic'
-        ]
-        
-        text_to_check = f"{title} {album}".lower()
-        return any(re.search(pattern, text_to_check) for pattern in acoustic_patterns)
+        return _version_flags(title, album)[1]
 
-    def _calculate_match_score_track(self, result: Dict[str, Any], target_title: str, 
-                             target_artist: str, prefer_live: bool, prefer_acoustic: bool, prefer_studio: bool) -> float:
+    def _calculate_match_score(self, result: Dict[str, Any], primary_field: str, target_primary: str,
+                               target_artist: str, prefer_live: bool, prefer_acoustic: bool, prefer_studio: bool) -> float:
         """
         Calculate a comprehensive match score for a search result.
         
         Considers multiple factors:
-        - Title similarity (exact vs fuzzy matching)
+        - Similarity of the primary field ('title' or 'album') to the target (exact vs fuzzy matching)
         - Artist similarity (if provided)  
         - Live/acoustic/studio preference matching
         - Album context for version detection
         - Quality indicators (explicit, remaster, etc.)
         """
-        title_clean = self._clean_for_matching(result['title'])
-        artist_clean = self._clean_for_matching(result['artist'])
-        album_clean = self._clean_for_matching(result['album'])
+        if '_title_clean' not in result:  # Not from parse_search_results; prepare it now
+            result = _search_result(result['position'], result['title'], result['artist'],
+                                    result['album'], result.get('raw_line', ''))
+        return self._calculate_match_score_fast(
+            result[f'_{primary_field}_clean'], result['_artist_clean'],
+            result['_is_live'], result['_is_acoustic'],
+            target_primary, self._normalize_for_exact_match(target_primary), target_artist,
+            prefer_live, prefer_acoustic, prefer_studio
+        )
+
+    def _calculate_match_score_fast(self, name_clean: str, artist_clean: str, is_live_track: bool,
+                                    is_acoustic_track: bool, target_name: str, target_name_exact: str,
+                                    target_artist: str, prefer_live: bool, prefer_acoustic: bool,
+                                    prefer_studio: bool, name_similarity: float = None,
+                                    artist_similarity: float = None) -> float:
+        """
+        Score one result from fields that were already cleaned and classified.
         
-        # Base title similarity score
-        if title_clean == target_title:
-            title_score = 1.0  # Exact match
-        else:
-            title_score = self._calculate_similarity(title_clean, target_title)
+        Args:
+            name_clean: Cleaned title (track search) or album name (album search)
+            artist_clean: Cleaned artist name
+            is_live_track: Whether the result looks like a live version
+            is_acoustic_track: Whether the result looks like an acoustic version
+            target_name: Cleaned target title or album
+            target_name_exact: target_name passed through _normalize_for_exact_match
+            target_artist: Cleaned target artist (or None)
+            prefer_live, prefer_acoustic, prefer_studio: Version preferences
+            name_similarity, artist_similarity: Precomputed similarities to the targets
+                                                (computed here when None)
             
-            # Special handling for exact matches with different spacing/punctuation
-            if self._normalize_for_exact_match(title_clean) == self._normalize_for_exact_match(target_title):
-                title_score = 1.0
+        Returns:
+            Combined score between 0.0 and 1.0
+        """
+        name_score = self._name_score(name_clean, target_name, target_name_exact, name_similarity)
         
         # Artist matching score
         artist_score = 0.0
         if target_artist:
-            if artist_clean == target_artist:
-                artist_score = 1.0
-            else:
-                artist_score = self._calculate_similarity(artist_clean, target_artist)
-                # Bonus for partial name matches
-                if target_artist in artist_clean or artist_clean in target_artist:
-                    artist_score = max(artist_score, 0.8)
-        
-        # Version type detection and scoring
-        is_live_track = self._detect_live_version(result['title'], result['album'])
-        is_acoustic_track = self._detect_acoustic_version(result['title'], result['album'])
-        is_studio_track = not is_live_track and not is_acoustic_track  # Studio is default
-        
-        version_score = 0.0
-        
-        if prefer_live:
-            if is_live_track:
-                version_score = 0.3  # Significant bonus for live versions when requested
-            else:
-                version_score = -0.1  # Small penalty when live requested but not found
-        elif prefer_acoustic:
-            if is_acoustic_track:
-                version_score = 0.3  # Significant bonus for acoustic versions when requested
-            else:
-                version_score = -0.1  # Small penalty when acoustic requested but not found
-        elif prefer_studio:
-            if is_studio_track:
-                version_score = 0.2  # Bonus for studio when specifically requested
-            else:
-                version_score = -0.1  # Penalty when studio requested but not found
-        else:
-            # Default preference: slightly prefer studio versions
-            if is_studio_track:
-                version_score = 0.1  # Small bonus for studio
-            elif is_live_track:
-                version_score = -0.05  # Very small penalty for live when not requested
-            else:  # acoustic
-                version_score = 0.05  # Neutral for acoustic
-        
-        # Combine scores
-        if target_artist:
-            combined_score = (title_score * 0.6) + (artist_score * 0.3) + version_score + 0.1
-        else:
-            combined_score = (title_score * 0.8) + version_score + 0.2
+            if (artist_similarity is None and artist_clean != target_artist
+                    and _tokens_contained(_word_tokens(artist_clean), _word_tokens(target_artist))):
+                artist_similarity = 1.0  # Same core names, e.g. "springsteen, bruce"
+            artist_score = self._artist_score(artist_clean, target_artist, artist_similarity)
         
-        return max(0.0, min(1.0, combined_score))
+        return _score_batch([name_score], [artist_score], (is_live_track,), (is_acoustic_track,),
+                            prefer_live, prefer_acoustic, prefer_studio, bool(target_artist))[0]
 
-    def _calculate_match_score_album(self, result: Dict[str, Any], target_album: str, 
-                             target_artist: str, prefer_live: bool, prefer_acoustic: bool, prefer_studio: bool) -> float:
+    def _name_score(self, name_clean: str, target_name: str, target_name_exact: str,
+                    similarity: Optional[float] = None) -> float:
+        """Score a cleaned title or album name against the target (computing similarity if None)."""
+        if name_clean == target_name:
+            return 1.0  # Exact match
+        
+        # Special handling for exact matches with different spacing/punctuation
+        if self._normalize_for_exact_match(name_clean) == target_name_exact:
+            return 1.0
+        return similarity if similarity is not None else self._calculate_similarity(name_clean, target_name)
+
+    def _artist_score(self, artist_clean: str, target_artist: str,
+                      similarity: Optional[float] = None) -> float:
+        """Score a cleaned artist against the target artist (computing similarity if None)."""
+        if artist_clean == target_artist:
+            return 1.0
+        artist_score = similarity if similarity is not None else self._calculate_similarity(artist_clean, target_artist)
+        # Bonus for partial name matches
+        if target_artist in artist_clean or artist_clean in target_artist:
+            artist_score = max(artist_score, 0.8)
+        return artist_score
+
+    def _perfect_match(self, results: List[Dict[str, Any]], target_title: str, target_artist: str,
+                       target_album: str, preferences: Dict[str, Any]) -> Optional[int]:
         """
-        Calculate a comprehensive match score for a search result.
+        Position of the one result that needs no further judgement, or None.
         
-        Considers multiple factors:
-        - Title similarity (exact vs fuzzy matching)
-        - Artist similarity (if provided)  
-        - Live/acoustic/studio preference matching
-        - Album context for version detection
-        - Quality indicators (explicit, remaster, etc.)
+        That is the only exact name and artist match, its version earns the largest
+        preference bonus (judged before scores are capped at 1.0, so an acoustic exact
+        match doesn't shadow a studio original) and no album in the list needs
+        interpretation (a compilation or live album is left to the LLM gate). Without a
+        target artist any cover could be an exact title match, so there is never one.
         """
-        artist_clean = self._clean_for_matching(result['artist'])
-        album_clean = self._clean_for_matching(result['album'])
-        
-        # Base title similarity score
-        if album_clean == target_album:
-            album_score = 1.0  # Exact match
-        else:
-            album_score = self._calculate_similarity(album_clean, target_album)
-            
-            # Special handling for exact matches with different spacing/punctuation
-            if self._normalize_for_exact_match(album_clean) == self._normalize_for_exact_match(target_album):
-                album_score = 1.0
-        
-        # Artist matching score
-        artist_score = 0.0
-        if target_artist:
-            if artist_clean == target_artist:
-                artist_score = 1.0
-            else:
-                artist_score = self._calculate_similarity(artist_clean, target_artist)
-                # Bonus for partial name matches
-                if target_artist in artist_clean or artist_clean in target_artist:
-                    artist_score = max(artist_score, 0.8)
-        
-        # Version type detection and scoring
-        is_live_track = self._detect_live_version(result['title'], result['album'])
-        is_acoustic_track = self._detect_acoustic_version(result['title'], result['album'])
-        is_studio_track = not is_live_track and not is_acoustic_track  # Studio is default
-        
-        version_score = 0.0
-        
-        if prefer_live:
-            if is_live_track:
-                version_score = 0.3  # Significant bonus for live versions when requested
-            else:
-                version_score = -0.1  # Small penalty when live requested but not found
-        elif prefer_acoustic:
-            if is_acoustic_track:
-                version_score = 0.3  # Significant bonus for acoustic versions when requested
-            else:
-                version_score = -0.1  # Small penalty when acoustic requested but not found
-        elif prefer_studio:
-            if is_studio_track:
-                version_score = 0.2  # Bonus for studio when specifically requested
-            else:
-                version_score = -0.1  # Penalty when studio requested but not found
-        else:
-            # Default preference: slightly prefer studio versions
-            if is_studio_track:
-                version_score = 0.1  # Small bonus for studio
-            elif is_live_track:
-                version_score = -0.05  # Very small penalty for live when not requested
-            else:  # acoustic
-                version_score = 0.05  # Neutral for acoustic
-        
-        # Combine scores
-        if target_artist:
-            combined_score = (album_score * 0.6) + (artist_score * 0.3) + version_score + 0.1
-        else:
-            combined_score = (album_score * 0.8) + version_score + 0.2
-        
-        return max(0.0, min(1.0, combined_score))
-
+        if not target_artist:
+            return None
+        target_name = self._clean_for_matching(target_album if self.album_search else target_title)
+        target_artist_clean = self._clean_for_matching(target_artist)
+        bonus = _version_bonus_table(bool(preferences.get('prefer_live', False)),
+                                     bool(preferences.get('prefer_acoustic', False)),
+                                     bool(preferences.get('prefer_studio', False)))
+        best_bonus = max(bonus.values())
+        
+        columns = _SearchColumns.from_results(results)
+        names_clean = columns.albums_clean if self.album_search else columns.titles_clean
+        exact = [i for i, name_clean in enumerate(names_clean)
+                 if name_clean == target_name and columns.artists_clean[i] == target_artist_clean]
+        if len(exact) != 1:
+            return None
+        i = exact[0]
+        if bonus[columns.is_live[i], columns.is_acoustic[i]] != best_bonus:
+            return None
+        if self._has_ambiguous_albums((position, None, result)
+                                      for position, result in zip(columns.positions, results)):
+            return None
+        return columns.positions[i]
+    
     def _get_programmatic_scores(self, results: List[Dict[str, Any]], target_title: str, 
                                  target_artist: str, target_album: str, preferences: Dict[str, Any]) -> List[Tuple[int, float, Dict]]:
         """Get programmatic scores for all results."""
@@ -642,32 +1225,47 @@ class MusicAgent:
         prefer_acoustic = preferences.get('prefer_acoustic', False)
         prefer_studio = preferences.get('prefer_studio', False)
         
-        scored_matches = []
-        if not self.album_search:
-            target_title_clean = self._clean_for_matching(target_title)
-            target_artist_clean = self._clean_for_matching(target_artist) if target_artist else None
-            
-            for result in results:
-                score = self._calculate_match_score_track(
-                    result, target_title_clean, target_artist_clean, prefer_live, prefer_acoustic, prefer_studio
-                )
-                
-                if score > 0.3:  # Minimum viable match threshold
-                    scored_matches.append((result['position'], score, result))
-        else:
-            # Album search mode - match by album name
-            target_album_clean = self._clean_for_matching(target_album)
-            target_artist_clean = self._clean_for_matching(target_artist) if target_artist else None
-            
-            for result in results:
-                score = self._calculate_match_score_album(
-                    result, target_album_clean, target_artist_clean, prefer_live, prefer_acoustic, prefer_studio
-                )
-                
-                if score > 0.3:  # Minimum viable match threshold
-                    scored_matches.append((result['position'], score, result))
-
-        return scored_matches
+        # Track searches match on the title, album searches on the album name
+        columns = _SearchColumns.from_results(results)
+        target_name = self._clean_for_matching(target_album if self.album_search else target_title)
+        target_name_exact = self._normalize_for_exact_match(target_name)
+        target_artist_clean = self._clean_for_matching(target_artist) if target_artist else None
+        
+        # Results were cleaned and classified when parsed; score from the prepared columns
+        names_clean = columns.albums_clean if self.album_search else columns.titles_clean
+        artists_clean = columns.artists_clean
+        is_live, is_acoustic = columns.is_live, columns.is_acoustic
+        
+        name_sims = self._similarities(target_name, names_clean)
+        artist_sims = [None] * len(results)
+        if target_artist_clean:
+            # Word containment settles most artist comparisons ("bruce springsteen" vs
+            # "bruce springsteen & the e street band"); only the rest need fuzzy matching
+            target_tokens = _word_tokens(target_artist_clean)
+            fuzzy = []
+            for i, tokens in enumerate(columns.artist_tokens):
+                if _tokens_contained(tokens, target_tokens):
+                    artist_sims[i] = 1.0
+                else:
+                    fuzzy.append(i)
+            if fuzzy:
+                sims = self._similarities(target_artist_clean, [artists_clean[i] for i in fuzzy])
+                for i, sim in zip(fuzzy, sims):
+                    artist_sims[i] = sim
+        
+        # String comparisons per row, then the score arithmetic over all rows at once
+        name_score, artist_score = self._name_score, self._artist_score
+        name_scores = [name_score(name_clean, target_name, target_name_exact, sim)
+                       for name_clean, sim in zip(names_clean, name_sims)]
+        artist_scores = ([artist_score(artist_clean, target_artist_clean, sim)
+                          for artist_clean, sim in zip(artists_clean, artist_sims)]
+                         if target_artist_clean else [])
+        scores = _score_batch(name_scores, artist_scores, is_live, is_acoustic,
+                              prefer_live, prefer_acoustic, prefer_studio, bool(target_artist_clean))
+        
+        # Minimum viable match threshold
+        return [(position, score, result)
+                for position, score, result in zip(columns.positions, scores, results) if score > 0.3]
     
     def select_best_match(self, results, target_title: str, target_artist: str = None, target_album: str = None, preferences = None):
         """
@@ -677,12 +1275,20 @@ class MusicAgent:
         falls back to programmatic selection otherwise.
         """
         log_progress("select_best_match")
-        log_progress("Search Results:")
-        log_progress('\n                  '.join([f"{r['position']}: {r['title']}, {r['artist']}, {r['album']}" for r in results]))
+        if LOG_ENABLED:  # Skip building the listing when nobody will read it
+            log_progress("Search Results:")
+            log_progress('\n                  '.join([f"{r['position']}: {r['title']}, {r['artist']}, {r['album']}" for r in results]))
         if not results:
             return None
             
         preferences = preferences or {}
+        mode = "album" if self.album_search else "track"
+        
+        # A result nothing else can beat needs neither fuzzy scoring nor the LLM
+        perfect = self._perfect_match(results, target_title, target_artist, target_album, preferences)
+        if perfect is not None:
+            log_progress("Perfect match - skipping scoring and LLM selection")
+            return perfect
         
         # First, get programmatic scores for all results
         programmatic_matches = self._get_programmatic_scores(results, target_title, target_artist, target_album, preferences)
@@ -690,14 +1296,21 @@ class MusicAgent:
         if not programmatic_matches:
             return None
         
-        # Determine if we should use LLM selection
-        if self.api_client: #and self._should_use_llm_selection(programmatic_matches, preferences):
+        # With a single result there is nothing for the LLM to choose between
+        if len(results) == 1:
+            log_progress("Single search result - skipping LLM selection")
+            return programmatic_matches[0][0]
+        
+        # Determine if we should use LLM selection (skipped while the API is failing)
+        selection_available = bool(self.api_client) and self.api_client.selection_available()
+        if not selection_available:
+            log_progress("LLM selection unavailable - using programmatic selection")
+        elif self._should_use_llm_selection(programmatic_matches, preferences):
             try:
                 log_progress("Using LLM to select best match...")
-                if self.album_search:
-                    llm_selection = self.llm_select_best_match_album(results, target_album, target_artist, preferences)
-                else:
-                    llm_selection = self.llm_select_best_match_track(results, target_title, target_artist, target_album, preferences)
+                llm_selection = self.llm_select_best_match(
+                    results, target_title, target_artist, target_album, preferences, mode=mode
+                )
                 if llm_selection:
                     log_progress("LLM selection completed")
                     return llm_selection
@@ -705,11 +1318,11 @@ class MusicAgent:
                     log_progress("LLM selection returned no result, using programmatic fallback")
             except Exception as e:
                 # Fallback to programmatic if LLM fails
-                log_progress(f"LLM selection failed ({e}), falling back to programmatic selection")
+                log_progress("LLM selection failed (%s), falling back to programmatic selection", e)
 
         # Use programmatic selection
         log_progress("Using programmatic selection")
-        best_match = max(programmatic_matches, key=lambda x: x[1])
+        best_match = max(programmatic_matches, key=itemgetter(1))
         return best_match[0]  # Return position
 
 
@@ -717,7 +1330,10 @@ class MusicAgent:
         """
         Determine if we should use LLM selection based on complexity indicators.
         
-        Use LLM when:
+        Always use it when album names need interpretation (e.g. a compilation); otherwise
+        never when the top match is strong and well ahead of the runner-up.
+        
+        Otherwise use LLM when:
         - Multiple good matches (ambiguous choice)
         - No clear programmatic winner
         - Complex preferences that might need contextual understanding
@@ -725,20 +1341,37 @@ class MusicAgent:
         if not programmatic_matches:
             return False
         
-        # Sort by score
-        programmatic_matches_sorted = sorted(programmatic_matches, key=lambda x: x[1], reverse=True)
-        top_score = programmatic_matches_sorted[0][1]
-        
-        # Count strong matches (score > 0.7)
-        strong_matches = [m for m in programmatic_matches if m[1] > 0.7]
+        # Even a decisive score can't tell a compilation from the original album
+        if self._has_ambiguous_albums(programmatic_matches):
+            log_progress("Album names need interpretation - using LLM selection")
+            return True
+        
+        # One pass for the top two scores and the number of strong matches (score > 0.7)
+        top_score = runner_up_score = -1.0
+        strong_count = 0
+        for _, score, _ in programmatic_matches:
+            if score > top_score:
+                top_score, runner_up_score = score, top_score
+            elif score > runner_up_score:
+                runner_up_score = score
+            if score > 0.7:
+                strong_count += 1
+        
+        # A strong match with a clear margin needs no LLM judgement
+        if top_score >= 0.9 and (len(programmatic_matches) == 1 or top_score - runner_up_score >= 0.15):
+            log_progress("Programmatic match is decisive (score %.2f, runner-up %.2f) - skipping LLM selection",
+                         top_score, max(runner_up_score, 0.0))
+            return False
         
         # Use LLM if:
         use_llm = (
-            len(strong_matches) >= 3 or  # Multiple good matches
+            strong_count >= 3 or  # Multiple good matches
             top_score < 0.8 or  # No clear winner
-            self._has_complex_preferences(preferences) or  # Complex requirements
-            self._has_ambiguous_albums(programmatic_matches)  # Album names need interpretation
+            self._has_complex_preferences(preferences)  # Complex requirements
         )
+        if not use_llm:
+            log_progress("No ambiguity in %d matches (top score %.2f) - skipping LLM selection",
+                         len(programmatic_matches), top_score)
         
         return use_llm
     
@@ -750,22 +1383,14 @@ class MusicAgent:
     
     def _has_ambiguous_albums(self, matches):
         """Check if album names might need LLM interpretation."""
-        ambiguous_patterns = [
-            'greatest hits', 'best of', 'collection', 'anthology',
-            'deluxe', 'remaster', 'anniversary', 'special edition'
-        ]
-        
-        for _, _, result in matches:
-            album_lower = result['album'].lower()
-            if any(pattern in album_lower for pattern in ambiguous_patterns):
-                return True
-        return False
+        return any(_AMBIGUOUS_ALBUM_RE.search(result.get('_album_cf') or result['album'].casefold())
+                   for _, _, result in matches)
 
     # ============================================================================
     # Search Query Generation Methods
     # ============================================================================
     
-    def generate_search_queries(self, title: str = None, artist: str = None, album: str = None, preferences: Dict[str, Any] = None) -> List[str]:
+    def generate_search_queries(self, title: str = None, artist: str = None, album: str = None, preferences: Dict[str, Any] = None) -> List[List[str]]:
         """
         Generate intelligent search queries with fallback strategies for API issues.
         
@@ -779,29 +1404,40 @@ class MusicAgent:
             preferences: Search preferences
             
         Returns:
-            Ordered list of search query strings to try
+            Ordered list of search queries to try, each already split into the
+            words passed to the sonos search command
         Called by search_match_play
         """
         log_progress("generate_search_queries")
         preferences = preferences or {}
-        query = ""
         
         if self.album_search:
-            query = f"{artist if artist else ''} {album if album else ''}"
+            queries = [f"{artist if artist else ''} {album if album else ''}"]
         else:
-            query = f"{title} {artist if artist else ''} {album if album else ''}"
+            queries = [f"{title} {artist if artist else ''} {album if album else ''}"]
+            # Fallbacks for searches that trip over the title (e.g. "fixing her hair")
+            sanitized = queries[0].translate(_QUERY_SANITIZE)
+            if sanitized != queries[0]:
+                queries.append(sanitized)
+            if album:
+                queries.append(f"{artist if artist else ''} {album}")
 
         # Handle version preferences
+        suffix = ""
         if preferences.get('prefer_live'):
-            query = f"{query} live"
+            suffix = " live"
         elif preferences.get('prefer_acoustic'):
-            query = f"{query} acoustic"
+            suffix = " acoustic"
         elif preferences.get('prefer_studio'):
-            query = f"{query} studio"
-        
-        return [query]
+            suffix = " studio"
+        
+        # Split once here; queries that differ only in spacing or case would run the same
+        # search twice
+        unique = {}
+        for query in queries:
+            unique.setdefault(tuple(query.casefold().split()), f"{query}{suffix}".split())
+        return list(unique.values())[:_MAX_SEARCH_QUERIES]
 
-    # not in use right now but could be useful for future enhancement
     def get_album_for_track(self, title: str, artist: str = None) -> str:
         """
         Use Claude API to identify the primary album that contains a specific song.
@@ -816,52 +1452,148 @@ class MusicAgent:
         Returns:
             Album name string, or empty string if lookup fails
         """
-        if not self.api_client:
-            log_progress("❌ No API client available for album lookup")
-            return ""
+        return self.get_albums_for_tracks([(title, artist)])[0]
+
+    def get_albums_for_tracks(self, pairs: List[Tuple[str, Optional[str]]]) -> List[str]:
+        """
+        Identify the primary album for several songs with a single Claude API call.
+        
+        Use this when the songs are known up front (e.g. a playlist) instead of calling
+        get_album_for_track per song. Cached answers are reused; only the remaining
+        songs are sent, as one numbered list.
+        
+        Args:
+            pairs: (title, artist) tuples; artist may be None
+            
+        Returns:
+            Album names in the same order as pairs ("" where the lookup failed)
+        """
+        albums = [""] * len(pairs)
+        if not self.api_client or not pairs:
+            if not self.api_client:
+                log_progress("❌ No API client available for album lookup")
+            return albums
+        
+        model = self.api_client.model
+        missing = []
+        for i, (title, artist) in enumerate(pairs):
+            cached = _cached_album(model, title, artist)
+            if cached:
+                albums[i] = cached
+            else:
+                missing.append(i)
+        log_progress("Album lookup cache: %d hits, %d misses", len(pairs) - len(missing), len(missing))
+        if not missing:
+            return albums
         
         try:
-            artist_part = f" by {artist}" if artist else ""
-            log_progress(f"🔍 Looking up album for '{title}'{artist_part}...")
+            for attempt, system in enumerate(_ALBUM_LOOKUP_SYSTEMS):
+                if attempt:
+                    log_progress("🔁 Retrying %d unanswered songs with examples", len(missing))
+                found = self._request_albums(system, [pairs[i] for i in missing])
+                for i, album in zip(missing, found or ()):
+                    album = album.strip() if isinstance(album, str) else ""
+                    if album:
+                        albums[i] = album
+                        _remember_album(model, pairs[i][0], pairs[i][1], album)
+                missing = [i for i in missing if not albums[i]]
+                if not missing:
+                    break
             
-            # Create a focused prompt for album identification
-            prompt = f"""Identify the primary album that contains the song "{title}"{artist_part}.
-
-Return ONLY the album name, nothing else. If the song appears on multiple albums, return the original studio album (not compilations, greatest hits, or live albums unless that's the only version).
-
-Examples:
-- "Harvest" by Neil Young → Harvest
-- "Comfortably Numb" by Pink Floyd → The Wall
-- "Fixing Her Hair" by Ani DiFranco → Imperfectly
+            log_progress("✅ Album lookup finished: %s", albums)
+            return albums
+        
+        except Exception as e:
+            log_progress("❌ Album lookup failed with exception: %s: %s", type(e).__name__, e)
+            return albums
 
-Song: "{title}"{artist_part}
-Album:"""
-            
-            # Use API client for album lookup
-            response = self.api_client.client.messages.create(
-                model=self.api_client.model,
-                max_tokens=50,
-                temperature=0.0,  # Deterministic responses
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            result = response.content[0].text.strip()
+    def _request_albums(self, system: List[Dict[str, Any]],
+                        songs: List[Tuple[str, Optional[str]]]) -> Optional[list]:
+        """
+        Ask Claude for the albums of the given songs as one numbered list.
+        
+        Args:
+            system: System prompt blocks (with or without examples)
+            songs: (title, artist) tuples; artist may be None
             
-            if result:
-                log_progress(f"✅ Album lookup successful: '{result}'")
-                return result
-            else:
-                log_progress("❌ Album lookup returned empty result")
-                return ""
-                
-        except Exception as e:
-            log_progress(f"❌ Album lookup failed with exception: {type(e).__name__}: {e}")
-            return ""
+        Returns:
+            The reply's array with one entry per song, or None if it didn't match up
+        """
+        numbered = '\n'.join(
+            f'{n}. "{title}"' + (f" by {artist}" if artist else "")
+            for n, (title, artist) in enumerate(songs, 1)
+        )
+        log_progress("🔍 Looking up albums for %d songs...", len(songs))
+        # Stream the reply and stop as soon as the JSON array is complete
+        response_text = ""
+        found = None
+        with self.api_client.client.messages.stream(
+            model=self.api_client.model,
+            max_tokens=_ALBUM_LOOKUP_TOKENS * len(songs),
+            timeout=_ALBUM_LOOKUP_TIMEOUT * (1 if len(songs) == 1 else 2),
+            temperature=0.0,  # Deterministic responses
+            system=system,
+            messages=[{"role": "user", "content": numbered}]
+        ) as stream:
+            for text in stream.text_stream:
+                response_text += text
+                if ']' in text:
+                    found = _album_array(response_text)
+                    if found is not None:
+                        break
+        
+        if found is None:
+            found = _album_array(response_text) or []
+        if len(found) != len(songs):
+            log_progress("❌ Album lookup returned %d albums for %d songs", len(found), len(songs))
+            return None
+        return found
 
     # ============================================================================
     # Main Workflow Method
     # ============================================================================
     
+    def _play_resolved(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Replay a request that played successfully before, or return None to search normally.
+        
+        The remembered search still has to run (`sonos select` plays from the CLI's last
+        search), but query fan-out, album lookups and selection are skipped. The track at
+        the remembered position must still be the one played last time.
+        """
+        entry = _get_resolved_cache().get(key)
+        if not entry or time.time() - entry['ts'] >= _RESOLVED_CACHE_TTL:
+            return None
+        
+        with _last_search_lock:
+            search_result = self.run_search(entry['command'])
+            if not search_result['success']:
+                return None
+            # Parsed like search_match_play's results, so total_results means the same
+            results = self.parse_search_results(search_result['output'], _MAX_SEARCH_RESULTS)
+            track = next((r for r in results if r['position'] == entry['position']), None)
+            if (track is None or track['title'] != entry['title'] or track['artist'] != entry['artist']):
+                log_progress("Remembered match moved in the search results - searching again")
+                return None
+        
+        log_progress("⚡ Replaying remembered match: %s by %s", track['title'], track['artist'])
+        play_result = self.play_track_by_position(entry['position'])
+        if not play_result['success']:
+            return None
+        _get_resolved_cache().put(key, {**entry, 'ts': time.time()})
+        return {
+            'success': True,
+            'message': f'Now playing: {track["title"]} by {track["artist"]}',
+            'details': {
+                'track': _public_result(track),
+                'search_query_used': ' '.join(entry['command'][2:]),
+                'position_played': entry['position'],
+                'total_results': len(results),
+                'used_album_lookup': False,
+                'resolved_from_cache': True
+            }
+        }
+    
     def search_match_play(self, title: str = None, artist: str = None, album: str = None, preferences: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Process a music request with pre-parsed components.
@@ -882,60 +1614,136 @@ Album:"""
         try:
             preferences = preferences or {}
             
+            # Step 0: A request that played successfully before goes straight to its track
+            resolved_key = _resolved_key(self.album_search, title, artist, album, preferences)
+            resolved = self._play_resolved(resolved_key)
+            if resolved is not None:
+                return resolved
+            
             # Step 1: Generate intelligent search queries with fallback strategies
             log_progress("Generating search queries...")
             search_queries = self.generate_search_queries(title, artist, album, preferences)
-            log_progress(f"Generated {len(search_queries)} search queries: {search_queries}")
+            if LOG_ENABLED:
+                log_progress("Generated %d search queries: %s", len(search_queries), [' '.join(q) for q in search_queries])
             
             # Step 2: Execute searches with enhanced error handling
             best_match = None
             search_results = None
             successful_query = None
+            successful_command = None
             api_parsing_failed = False
+            used_album_lookup = False
+            album_future = None  # Album lookup, started on the first API parsing failure
+            completed = []  # Searches the CLI answered (only these may be remembered as failed)
+            
+            # The search mode is fixed for the whole request, so pick the command once
+            command_name = 'searchalbum' if self.album_search else 'searchtrack'
+            log_progress("%s search mode - using sonos %s query", 'Album' if self.album_search else 'Track', command_name)
+            commands = [['sonos', command_name, *query] for query in search_queries]
             
-            for query in search_queries:
-                log_progress(f"Trying search: '{query}'")
-                try:
-                    if self.album_search:
-                        log_progress("Album search mode - using sonos searchalbum query")
-                        search_result = self.execute_sonos_command(['sonos', 'searchalbum'] + query.split())
-                    else:
-                        log_progress("Track search mode - using sonos searchtrack  query")
-                        search_result = self.execute_sonos_command(['sonos', 'searchtrack'] + query.split())
-                    if search_result['success']:
-                        log_progress(f"sonos search[track/album] command was successful")
-                    else:   
-                        log_progress(f"sonos search[track/album] command failed: {search_result.get('error', 'Unknown error')}")
+            # Searches that found nothing moments ago would find nothing again
+            known_failed = [command for command in commands if _search_recently_failed(command)]
+            if known_failed:
+                log_progress("Skipping %d search(es) that failed in the last %.0fs", len(known_failed), _FAILED_SEARCH_TTL)
+                commands = [command for command in commands if command not in known_failed]
+            
+            # All queries run at once; results are still considered in priority order. When the
+            # CLI still holds the primary query's results (e.g. from the speculative search),
+            # those are scored first and the fallbacks only run if they don't match.
+            with _last_search_lock:
+                batches = [commands]
+                if len(commands) > 1 and _reusable_search_output(tuple(commands[0])) is not None:
+                    batches = [commands[:1], commands[1:]]
+                settled_output = None
+                for batch in batches:
+                    searches, finish_order = self._start_searches(batch)
+                    accepted = None
+                    for index, command in enumerate(batch):
+                        query = ' '.join(command[2:])
+                        log_progress("Trying search: '%s'", query)
+                        try:
+                            search_result = searches[index].result()
+                            if search_result['success']:
+                                log_progress("sonos search[track/album] command was successful")
+                            else:   
+                                log_progress("sonos search[track/album] command failed: %s", search_result.get('error', 'Unknown error'))
                     
-                    # Check for API parsing failure in error message (since exceptions are caught by execute_sonos_command)
-                    if not search_result['success']:
-                        continue
+                            # API parsing failures are flagged by execute_sonos_command (it catches the exceptions)
+                            if not search_result['success']:
+                                if search_result.get('api_parse_error'):
+                                    api_parsing_failed = True
+                                    if (album_future is None and title and not album
+                                            and not self.album_search and self.api_client):
+                                        album_future = _album_lookups.submit(self.get_album_for_track, title, artist)
+                                continue
+                            completed.append(command)
                     
-                    if search_result['success'] and search_result['output'].strip():
-                        results = self.parse_search_results(search_result['output'])
+                            if search_result['success'] and search_result['output'].strip():
+                                results = self.parse_search_results(search_result['output'], _MAX_SEARCH_RESULTS)
                         
-                        if results:
-                            log_progress(f"Found {len(results)} results")
-                            # Step 3: Analyze results and find best match
-                            match_position = self.select_best_match(
-                                results, title, artist, album, preferences
-                            )
+                                if results:
+                                    log_progress("Found %d results", len(results))
+                                    # Step 3: Analyze results and find best match
+                                    match_position = self.select_best_match(
+                                        results, title, artist, album, preferences
+                                    )
                             
-                            if match_position:
-                                log_progress(f"Selected position {match_position}")
-                                best_match = match_position
-                                search_results = results
-                                successful_query = query
-                                break
-                        else:
-                            log_progress("No valid results found")
-                    else:
-                        log_progress("Search command failed or returned no results")
+                                    if match_position:
+                                        log_progress("Selected position %d", match_position)
+                                        best_match = match_position
+                                        search_results = results
+                                        successful_query = query
+                                        successful_command = command
+                                        accepted = index
+                                        break
+                                else:
+                                    log_progress("No valid results found")
+                            else:
+                                log_progress("Search command failed or returned no results")
+                
+                        except Exception as e:
+                            # Log unexpected errors but continue trying
+                            log_progress("⚠️ Unexpected error for query '%s': %s", query, e)
+                            continue
+                
+                    settled_output = self._settle_searches(batch, searches, finish_order, accepted)
+                    if accepted is not None:
+                        break
                 
-                except Exception as e:
-                    # Log unexpected errors but continue trying
-                    log_progress(f"⚠️ Unexpected error for query '{query}': {str(e)}")
-                    continue
+                # Step 2b: The CLI choked on the music service's reply, so search the album instead
+                if not best_match and api_parsing_failed and album_future is not None:
+                    try:
+                        # Each lookup attempt is bounded by its own API timeout
+                        album_name = album_future.result(timeout=_ALBUM_LOOKUP_TIMEOUT * len(_ALBUM_LOOKUP_SYSTEMS))
+                    except Exception as e:
+                        log_progress("❌ Album lookup unavailable for fallback: %s", type(e).__name__)
+                        album_name = ""
+                    if album_name:
+                        command = ['sonos', 'searchtrack', *f"{artist or ''} {album_name}".split()]
+                        query = ' '.join(command[2:])
+                        log_progress("📀 API parsing failed - trying album search: '%s'", query)
+                        search_result = self.run_search(command)
+                        results = self.parse_search_results(search_result['output']) if search_result['success'] else []
+                        match_position = self.select_best_match(
+                            results, title, artist, album_name, preferences
+                        ) if results else None
+                        if match_position:
+                            log_progress("Selected position %s", match_position)
+                            best_match = match_position
+                            search_results = results
+                            successful_query = query
+                            successful_command = command
+                            used_album_lookup = True
+            
+            # Timeouts and CLI errors may be transient, so only searches that ran and
+            # found nothing acceptable are skipped next time
+            if not best_match:
+                _remember_failed_searches(completed)
+            
+            if settled_output is not None:
+                log_progress("⚠️ Search results changed when re-run - selecting again")
+                search_results = self.parse_search_results(settled_output, _MAX_SEARCH_RESULTS)
+                best_match = self.select_best_match(search_results, title, artist, album, preferences)
             
             if not best_match:
                 return {
@@ -944,30 +1752,41 @@ Album:"""
                     'details': {
                         'parsed_title': title,
                         'parsed_artist': artist,
-                        'queries_tried': search_queries,
+                        'queries_tried': [' '.join(q) for q in search_queries],
                         'api_parsing_failed': api_parsing_failed
                     }
                 }
             
-            # Step 4: Play the selected track
-            selected_track = next(
-                (r for r in search_results if r['position'] == best_match), 
-                None
-            )
+            # Step 4: Play the selected track (positions are normally 1..N in list order)
+            index = best_match - 1
+            if 0 <= index < len(search_results) and search_results[index]['position'] == best_match:
+                selected_track = search_results[index]
+            else:
+                selected_track = next(
+                    (r for r in search_results if r['position'] == best_match), 
+                    None
+                )
             
-            log_progress(f"Playing track: {selected_track['title']} by {selected_track['artist']}")
+            log_progress("Playing track: %s by %s", selected_track['title'], selected_track['artist'])
             play_result = self.play_track_by_position(best_match)
             
             if play_result['success']:
+                _get_resolved_cache().put(resolved_key, {
+                    'command': successful_command,
+                    'position': best_match,
+                    'title': selected_track['title'],
+                    'artist': selected_track['artist'],
+                    'ts': time.time()
+                })
                 return {
                     'success': True,
                     'message': f'Now playing: {selected_track["title"]} by {selected_track["artist"]}',
                     'details': {
-                        'track': selected_track,
+                        'track': _public_result(selected_track),
                         'search_query_used': successful_query,
                         'position_played': best_match,
                         'total_results': len(search_results),
-                        'used_album_lookup': 'album:' in successful_query if successful_query else False
+                        'used_album_lookup': used_album_lookup
                     }
                 }
             else:
@@ -975,7 +1794,7 @@ Album:"""
                     'success': False,
                     'message': f'Found the track but failed to play it: {play_result.get("error", "Unknown error")}',
                     'details': {
-                        'found_track': selected_track,
+                        'found_track': _public_result(selected_track),
                         'play_error': play_result.get('error')
                     }
                 }
@@ -987,3 +1806,65 @@ Album:"""
                 'details': {'error': str(e)}
             }
     
+
+
+# ============================================================================
+# Convenience Functions
+# ============================================================================
+
+_agent: Optional[MusicAgent] = None  # Shared by the playback helpers below
+_agent_lock = threading.Lock()
+
+
+def _get_agent() -> MusicAgent:
+    """
+    Return the process-wide agent used by the playback helpers, creating it on first use.
+    
+    Pausing, resuming and asking what is playing never need the Claude API, so the agent
+    is created without an API client.
+    """
+    global _agent
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                _agent = MusicAgent(api_client=False)
+    return _agent
+
+
+def pause_music() -> Dict[str, Any]:
+    """Pause playback; returns the execute_sonos_command result."""
+    return _get_agent().execute_sonos_command(['sonos', 'pause'])
+
+
+def resume_music() -> Dict[str, Any]:
+    """Resume playback; returns the execute_sonos_command result."""
+    return _get_agent().execute_sonos_command(['sonos', 'resume'])
+
+
+def get_current_track() -> Dict[str, Any]:
+    """Get information about the currently playing track (`sonos what`)."""
+    return _get_agent().get_current_track_info()
+
+
+def _prewarm() -> None:
+    """
+    Pay one-time startup costs in the background so the first request doesn't.
+    
+    Resolves the sonos executable, opens the persistent caches and creates the shared
+    API client (which imports the SDK and builds its connection pools). Failures are
+    ignored; the request path simply pays them instead.
+    """
+    try:
+        _resolve_executable('sonos')
+        _get_resolved_cache()
+        _get_album_cache()
+        from claude_api_client import get_api_client
+        get_api_client()
+    except Exception:
+        pass
+
+
+# Opt-in (CLAUDE_MUSIC_PREWARM=1) for long-lived processes, so one-off scripts such as
+# pause_music() don't build an API client they never use
+if os.getenv('CLAUDE_MUSIC_PREWARM') == '1':
+    threading.Thread(target=_prewarm, name="music-prewarm", daemon=True).start()
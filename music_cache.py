@@ -0,0 +1,332 @@
+"""
+Local caches that let repeated music requests skip Claude API round-trips.
+
+PersistentLRU maps exact (normalized) keys to results, so a repeated request is
+answered without any model at all. The semantic cache embeds each normalized request with a small sentence-transformers
+model and returns a previously stored result when a new request is close enough in
+embedding space (e.g. "play harvest by neil young" vs "put on neil young's harvest").
+Entries are persisted to a small SQLite database so they survive across sessions.
+
+The semantic cache is opt-in (CLAUDE_MUSIC_SEMANTIC_CACHE=1), and sentence-transformers
+and numpy are optional: they are imported only when an enabled cache is created, and
+without them the semantic cache is simply disabled and every lookup misses.
+"""
+
+import os
+import json
+import atexit
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+
+    def _dumps(value: Any) -> str:
+        """Encode a value as JSON text."""
+        return orjson.dumps(value).decode()
+    _loads = orjson.loads
+except ImportError:
+    _dumps, _loads = json.dumps, json.loads  # orjson is optional
+
+CACHE_DIR = os.path.expanduser("~/.cache/claude_music")
+SEMANTIC_CACHE_ENABLED = os.getenv('CLAUDE_MUSIC_SEMANTIC_CACHE', '0') == '1'
+
+# Encoders are expensive to load, so share one per embedding model across all caches
+_ENCODERS: Dict[str, Any] = {}
+_ENCODERS_LOCK = threading.Lock()
+np = None  # numpy, imported with sentence-transformers by _semantic_backend()
+_SentenceTransformer = None
+_BACKEND_CHECKED = False
+
+
+def _semantic_backend() -> bool:
+    """Import numpy and sentence-transformers on first use; whether they are available."""
+    global np, _SentenceTransformer, _BACKEND_CHECKED
+    with _ENCODERS_LOCK:
+        if not _BACKEND_CHECKED:
+            _BACKEND_CHECKED = True
+            try:
+                import numpy
+                from sentence_transformers import SentenceTransformer
+                np, _SentenceTransformer = numpy, SentenceTransformer
+            except ImportError:
+                pass  # semantic caching is optional
+        return _SentenceTransformer is not None
+
+
+def _get_encoder(model_name: str):
+    """Load (once per process) and return the sentence-transformers encoder."""
+    with _ENCODERS_LOCK:
+        encoder = _ENCODERS.get(model_name)
+        if encoder is None:
+            encoder = _SentenceTransformer(model_name)
+            _ENCODERS[model_name] = encoder
+        return encoder
+
+
+def _open_db(filename: str) -> Optional[sqlite3.Connection]:
+    """Open a cache database in CACHE_DIR, or return None if that isn't possible."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        return sqlite3.connect(os.path.join(CACHE_DIR, filename), check_same_thread=False)
+    except Exception:
+        return None  # Fall back to an in-memory cache
+
+
+class SemanticCache:
+    """
+    Embedding-similarity cache with LRU eviction and SQLite persistence.
+
+    Entries live in `namespace` (e.g. the Claude model name) so results produced by
+    different models never mix. Lookups compare the query embedding against every
+    cached embedding with a single matrix product; embeddings are L2-normalized so the
+    dot product is the cosine similarity.
+    """
+
+    def __init__(self, namespace: str, model_name: str = "all-MiniLM-L6-v2",
+                 threshold: float = 0.92, maxsize: int = 256,
+                 db_filename: str = "semantic_cache.db", enabled: Optional[bool] = None):
+        """
+        Initialize the cache and load any persisted entries.
+
+        Args:
+            namespace: Partition key for entries (e.g. the Claude model used)
+            model_name: sentence-transformers model used to embed keys
+            threshold: Minimum cosine similarity for a cache hit
+            maxsize: Maximum number of entries kept (least recently used are evicted)
+            db_filename: SQLite file (inside CACHE_DIR) used for persistence
+            enabled: Whether to use the cache at all (defaults to CLAUDE_MUSIC_SEMANTIC_CACHE)
+        """
+        self.namespace = namespace
+        self.model_name = model_name
+        self.threshold = threshold
+        self.maxsize = maxsize
+        if enabled is None:
+            enabled = SEMANTIC_CACHE_ENABLED
+        self.enabled = enabled and _semantic_backend()
+
+        self._entries = OrderedDict()  # key -> (embedding, value), oldest first
+        self._matrix = None  # Stacked embeddings, rebuilt lazily after changes
+        self._keys = []
+        self._lock = threading.Lock()
+        self._db = None
+        self._touched: Dict[str, float] = {}  # key -> last hit time, persisted lazily
+
+        if not self.enabled:
+            return
+
+        try:
+            self._encoder = _get_encoder(model_name)
+        except Exception:
+            self.enabled = False
+            return
+
+        self._db = _open_db(db_filename)
+        if self._db is not None:
+            try:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS semantic_cache ("
+                    "namespace TEXT, key TEXT, embedding BLOB, value TEXT, ts REAL, "
+                    "PRIMARY KEY (namespace, key))"
+                )
+                rows = self._db.execute(
+                    "SELECT key, embedding, value FROM semantic_cache "
+                    "WHERE namespace = ? ORDER BY ts DESC LIMIT ?",
+                    (namespace, maxsize)
+                ).fetchall()
+                for key, blob, value in reversed(rows):
+                    self._entries[key] = (np.frombuffer(blob, dtype=np.float32), _loads(value))
+            except Exception:
+                self._db = None
+        if self._db is not None:
+            atexit.register(self.flush)
+
+    def encode(self, text: str):
+        """Embed `text` as a normalized float32 vector, or return None if disabled."""
+        if not self.enabled:
+            return None
+        vec = self._encoder.encode(text, normalize_embeddings=True)
+        return np.asarray(vec, dtype=np.float32)
+
+    def lookup(self, embedding, accept: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        """
+        Return the cached value most similar to `embedding`, or None on a miss.
+
+        Args:
+            embedding: Vector returned by encode()
+            accept: Optional predicate a candidate value must also satisfy
+
+        Returns:
+            The cached value if the best match scores at least `threshold`
+        """
+        if embedding is None:
+            return None
+
+        with self._lock:
+            if not self._entries:
+                return None
+            if self._matrix is None:
+                self._keys = list(self._entries.keys())
+                self._matrix = np.stack([vec for vec, _ in self._entries.values()])
+
+            scores = self._matrix @ embedding
+            best = int(np.argmax(scores))
+            if float(scores[best]) < self.threshold:
+                return None
+
+            key = self._keys[best]
+            value = self._entries[key][1]
+            if accept is not None and not accept(value):
+                return None
+
+            self._entries.move_to_end(key)
+            self._touched[key] = time.time()  # Written with the next store or at exit
+            return value
+
+    def store(self, key: str, embedding, value: Any) -> None:
+        """Add or replace the entry for `key`, evicting the least recently used entry."""
+        if embedding is None:
+            return
+
+        with self._lock:
+            self._entries[key] = (embedding, value)
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.maxsize:
+                evicted.append(self._entries.popitem(last=False)[0])
+            self._matrix = None
+
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO semantic_cache VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, key, embedding.tobytes(), _dumps(value), time.time())
+                )
+                self._db.executemany(
+                    "DELETE FROM semantic_cache WHERE namespace = ? AND key = ?",
+                    [(self.namespace, k) for k in evicted]
+                )
+                self._write_touched()
+                self._db.commit()
+            except Exception:
+                pass  # Persistence is best effort
+
+    def flush(self) -> None:
+        """Persist the timestamps of entries hit since the last write."""
+        with self._lock:
+            if self._db is None or not self._touched:
+                return
+            try:
+                self._write_touched()
+                self._db.commit()
+            except Exception:
+                pass
+
+    def _write_touched(self) -> None:
+        """Queue the pending hit timestamps so LRU order survives restarts (caller commits)."""
+        self._db.executemany(
+            "UPDATE semantic_cache SET ts = ? WHERE namespace = ? AND key = ?",
+            [(ts, self.namespace, k) for k, ts in self._touched.items()]
+        )
+        self._touched.clear()
+
+
+class PersistentLRU:
+    """
+    Exact-key LRU cache of JSON-serializable values with SQLite persistence.
+
+    Used where a normalized string identifies a result exactly (e.g. a repeated
+    request), so no embedding model is needed. Entries live in `namespace`.
+    """
+
+    def __init__(self, namespace: str, maxsize: int = 512, db_filename: str = "lru_cache.db"):
+        """
+        Initialize the cache and load any persisted entries.
+
+        Args:
+            namespace: Partition key for entries (e.g. the Claude model used)
+            maxsize: Maximum number of entries kept (least recently used are evicted)
+            db_filename: SQLite file (inside CACHE_DIR) used for persistence
+        """
+        self.namespace = namespace
+        self.maxsize = maxsize
+
+        self._entries = OrderedDict()  # key -> value, oldest first
+        self._touched: Dict[str, float] = {}  # key -> last hit time, persisted lazily
+        self._lock = threading.Lock()
+        self._db = _open_db(db_filename)
+        if self._db is None:
+            return
+
+        try:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS lru_cache ("
+                "namespace TEXT, key TEXT, value TEXT, ts REAL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            rows = self._db.execute(
+                "SELECT key, value FROM lru_cache WHERE namespace = ? ORDER BY ts DESC LIMIT ?",
+                (namespace, maxsize)
+            ).fetchall()
+            for key, value in reversed(rows):
+                self._entries[key] = _loads(value)
+        except Exception:
+            self._db = None
+            return
+        atexit.register(self.flush)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored for `key`, or None on a miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                return None
+            # LRU order is kept in memory; the hit is persisted with the next put or at exit
+            self._entries.move_to_end(key)
+            self._touched[key] = time.time()
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Add or replace the entry for `key`, evicting the least recently used entry."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._touched.pop(key, None)
+            evicted = []
+            while len(self._entries) > self.maxsize:
+                evicted.append(self._entries.popitem(last=False)[0])
+            for k in evicted:
+                self._touched.pop(k, None)
+            self._write([
+                ("INSERT OR REPLACE INTO lru_cache VALUES (?, ?, ?, ?)",
+                 [(self.namespace, key, _dumps(value), time.time())]),
+                ("DELETE FROM lru_cache WHERE namespace = ? AND key = ?",
+                 [(self.namespace, k) for k in evicted]),
+            ])
+
+    def flush(self) -> None:
+        """Persist the timestamps of entries hit since the last write."""
+        with self._lock:
+            if self._touched:
+                self._write([])
+
+    def _write(self, statements: List[Tuple[str, List[tuple]]]) -> None:
+        """Run statements plus pending hit timestamps in one commit; persistence is best effort."""
+        if self._db is None:
+            return
+        touched = [(ts, self.namespace, k) for k, ts in self._touched.items()]
+        self._touched.clear()
+        if touched:
+            statements = statements + [
+                ("UPDATE lru_cache SET ts = ? WHERE namespace = ? AND key = ?", touched)
+            ]
+        try:
+            for sql, params in statements:
+                self._db.executemany(sql, params)
+            self._db.commit()
+        except Exception:
+            pass
@@ -79,11 +79,6 @@ Examples:
 - "play a live version of harvest by neil young" → {{"title": "harvest", "artist": "neil young", "album": null, "preferences": {{"prefer_live": true}}}}
 - "play album dark side of the moon" by pink floyd → {{"title": null, "artist": "pink floyd", "album": "the dark side of the moon", "preferences": {{}}}}
 
-IMPORTANT: You MUST return ONLY a valid JSON object with exactly these keys: title, artist, album, preferences
-- Do not include any explanatory text before or after the JSON
-- Do not wrap the JSON in code blocks or markdown
-- Return only the raw JSON, nothing else
-
 Return the result as a valid JSON object with exactly these keys: title, artist, album, preferences
 Any one of title, artist, or album can be null if not clearly specified but at least one must be non-null.
 
@@ -96,6 +91,45 @@ Required JSON format:
 }}
 """
 
+BATCH_MUSIC_PARSING_PROMPT = """
+Parse each of the following {count} natural language music requests into structured components:
+
+{requests}
+
+For each request extract these components:
+1. title: The song title (clean, lowercase, no annotations)
+2. artist: The artist name (clean, no possessives)
+3. album: The album name if mentioned (clean, no possessives, or null if not specified)
+4. preferences: Dictionary with boolean flags for user preferences
+
+Handle these common patterns:
+- **Play request indicators**: "I'd like to hear", "play", "put on", "I want to hear", "can you play"
+- **Possessive forms**: "[Artist]'s [Song]" → artist="[Artist]", title="[Song]"
+- **By constructions**: "[Song] by [Artist]" → title="[Song]", artist="[Artist]"
+- **Album indicators**: "from [Album]", "[Album] album", "off [Album]" → album="[Album]"
+- **Live preferences**: "live version of", "concert version", "live recording" → prefer_live: true
+- **Acoustic preferences**: "acoustic version", "unplugged version", "acoustic" → prefer_acoustic: true
+- **Studio preferences**: "studio version", "original version", "studio recording" → prefer_studio: true
+
+Special handling:
+- Remove possessive "'s" from artist and album names
+- Convert titles and albums to lowercase for consistency
+- Don't include version type indicators in the title
+- Set preference flags based on explicit version requests
+- Any one of title, artist, or album can be null if not clearly specified but at least one must be non-null
+
+IMPORTANT: You MUST return ONLY a valid JSON array containing exactly {count} objects, one per request and in the same order.
+- Each object has exactly these keys: title, artist, album, preferences
+- Do not include any explanatory text before or after the JSON
+- Do not wrap the JSON in code blocks or markdown
+
+Required JSON format:
+[
+  {{"title": "song title here or null", "artist": "artist name here or null", "album": "album name here or null", "preferences": {{}}}},
+  ...
+]
+"""
+
 ENHANCED_MUSIC_PARSING_PROMPT_ORIG = """
 Parse the following natural language music request into structured components:
 
@@ -177,6 +211,20 @@ Which position number (1-{max_position}) best matches the request?
 Return ONLY the position number, no explanation.
 """
 
+def _format_title_result(result) -> str:
+    """Format one search result (dict or (position, title, artist, album) tuple) as a prompt line."""
+    if isinstance(result, dict):
+        return f"{result.get('position', '?')}. {result.get('title', 'Unknown')}-{result.get('artist', 'Unknown')}-{result.get('album', 'Unknown')}"
+    pos, title_text, artist_text_result, album = result[:4]
+    return f"{pos}. {title_text}-{artist_text_result}-{album}"
+
+def _format_album_result(result) -> str:
+    """Format one album search result (dict or (position, album, artist) tuple) as a prompt line."""
+    if isinstance(result, dict):
+        return f"{result.get('position', '?')}. {result.get('album', 'Unknown')}-{result.get('artist', 'Unknown')}"
+    pos, album_text, artist_text_result = result[:3]
+    return f"{pos}. {album_text}-{artist_text_result}"
+
 def format_result_selection_title_prompt(title: str, artist: str = None, preferences: dict = None, results: list = None) -> str:
     """
     Format the result selection prompt with actual search data.
@@ -210,20 +258,7 @@ def format_result_selection_title_prompt(title: str, artist: str = None, prefere
         preferences_text = "no specific version preference"
     
     # Format results list
-    results_lines = []
-    for result in results:
-        if isinstance(result, dict):
-            pos = result.get('position', '?')
-            title_text = result.get('title', 'Unknown')
-            artist_text_result = result.get('artist', 'Unknown')
-            album = result.get('album', 'Unknown')
-            results_lines.append(f"{pos}. {title_text}-{artist_text_result}-{album}")
-        else:
-            # Handle tuple format (position, title, artist, album)
-            pos, title_text, artist_text_result, album = result[:4]
-            results_lines.append(f"{pos}. {title_text}-{artist_text_result}-{album}")
-    
-    results_list = "\n".join(results_lines)
+    results_list = "\n".join(_format_title_result(result) for result in results)
     max_position = len(results)
     
     return TITLE_RESULT_SELECTION_PROMPT_TEMPLATE.format(
@@ -267,20 +302,7 @@ def format_result_selection_album_prompt(album: str, artist: str = None, prefere
         preferences_text = "no specific version preference"
     
     # Format results list
-    results_lines = []
-    for result in results:
-        if isinstance(result, dict):
-            pos = result.get('position', '?')
-            album_text = result.get('album', 'Unknown')
-            artist_text_result = result.get('artist', 'Unknown')
-            #album = result.get('album', 'Unknown')
-            results_lines.append(f"{pos}. {album_text}-{artist_text_result}")
-        else:
-            # Handle tuple format (position, title, artist, album)
-            pos, album_text, artist_text_result = result[:3]
-            results_lines.append(f"{pos}. {title_text}-{artist_text_result}")
-    
-    results_list = "\n".join(results_lines)
+    results_list = "\n".join(_format_album_result(result) for result in results)
     max_position = len(results)
     
     return ALBUM_RESULT_SELECTION_PROMPT_TEMPLATE.format(
@@ -0,0 +1,94 @@
+"""
+Shared progress log for monitoring music requests (e.g. in headless mode).
+
+The API client and the music agent both append to .claude_music_progress.log. Callers
+only format the line and put it on a bounded queue; a daemon thread owns the single
+open file handle, writes queued lines and flushes whenever the queue drains, so no
+file I/O happens on the request path. Lines are dropped rather than blocking if the
+writer falls behind.
+
+Set CLAUDE_MUSIC_LOG=0 to disable progress logging entirely.
+"""
+
+import os
+import time
+import queue
+import atexit
+import threading
+
+LOG_ENABLED = os.getenv('CLAUDE_MUSIC_LOG', '1') != '0'
+
+_LOG_PATH = os.path.expanduser(".claude_music_progress.log")
+_LOG_QUEUE = queue.Queue(maxsize=1024)
+_LOG_THREAD = None
+_LOG_THREAD_LOCK = threading.Lock()
+_LOG_FAILED = False
+_LAST_STAMP = (-1, "")  # (epoch second, its formatted "%H:%M:%S"), reused within a second
+
+
+def _log_writer() -> None:
+    """Write queued lines to the log file, flushing whenever the queue is empty."""
+    global _LOG_FAILED
+
+    try:
+        fh = open(_LOG_PATH, "a", buffering=8192)
+    except Exception:
+        fh = None
+        _LOG_FAILED = True  # Don't fail if we can't write to file
+
+    while True:
+        line = _LOG_QUEUE.get()
+        try:
+            if fh is not None:
+                fh.write(line)
+                if _LOG_QUEUE.empty():
+                    fh.flush()
+        except Exception:
+            pass
+        finally:
+            _LOG_QUEUE.task_done()
+
+
+def _ensure_writer() -> None:
+    """Start the writer thread on first use."""
+    global _LOG_THREAD
+
+    with _LOG_THREAD_LOCK:
+        if _LOG_THREAD is None:
+            _LOG_THREAD = threading.Thread(target=_log_writer, name="progress-log", daemon=True)
+            _LOG_THREAD.start()
+            atexit.register(flush_progress_log)
+
+
+def write_progress(source: str, message: str) -> None:
+    """
+    Queue a timestamped progress line for the log.
+
+    Args:
+        source: Component emitting the line (e.g. "API" or "Agent")
+        message: Progress message
+    """
+    if not LOG_ENABLED or _LOG_FAILED:
+        return
+
+    global _LAST_STAMP
+
+    ns = time.time_ns()
+    second = ns // 1_000_000_000
+    stamp = _LAST_STAMP
+    if stamp[0] != second:
+        stamp = _LAST_STAMP = (second, time.strftime("%H:%M:%S", time.localtime(second)))
+    line = f"[{stamp[1]}.{ns // 1_000_000 % 1000:03d}] 🎵 {source} {message}\n"
+
+    if _LOG_THREAD is None:
+        _ensure_writer()
+    try:
+        _LOG_QUEUE.put_nowait(line)
+    except queue.Full:
+        pass  # Never block a request on logging
+
+
+def flush_progress_log() -> None:
+    """Wait until every queued progress line has been written and flushed."""
+    if _LOG_THREAD is not None and not _LOG_FAILED:
+        _LOG_QUEUE.join()